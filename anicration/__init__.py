@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from .mediaparser import media_parser, get_media_link
+from .mediaparser import media_parser, iter_media_links, iter_media_records, get_media_link
 from .seiyuuhandler import twitter_media_downloader
 from .confighandler import ConfigHandler
 
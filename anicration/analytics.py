@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Maths over the counters track_twitter_info stores(see timeseries.py) : growth deltas, rolling
+rates, daily/weekly resampling and gaps of missed hours, computed on whole arrays at once.
+Every function takes and returns a `Series`(account, timestamps in unix seconds, values).
+`main()` is the `anicration_stats` command, which writes the results as CSV.
+Requires the optional `numpy` dependency.
+"""
+import os
+import sys
+import csv
+import logging
+import argparse
+
+from datetime import datetime, timedelta
+from collections import namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .timeseries import TimeSeriesStore, COUNTERS, Sample
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+HOUR = 3600
+PERIODS = {'hourly': HOUR, 'daily': 24 * HOUR, 'weekly': 7 * 24 * HOUR}
+# 1970-01-01(unix time 0) was a Thursday, weekly buckets start on Monday
+_WEEK_SHIFT = 3 * 24 * HOUR
+# a step this many intervals long(or more) means at least one snapshot was missed
+_GAP_TOLERANCE = 1.5
+
+Series = namedtuple('Series', ['account', 'timestamps', 'values'])
+Gaps = namedtuple('Gaps', ['account', 'starts', 'ends', 'missing'])
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError('Analytics requires numpy. Install it with "pip install numpy".')
+
+def _record_dtype():
+    return numpy.dtype([(name, '<i8') for name in Sample._fields])
+
+def load_counters(store, counter='followers_count', accounts=None, start=None, end=None):
+    """Loads a counter of `accounts`(defaults to every account in `store`) between `start` and
+    `end`(see `TimeSeriesStore.range()`). Returns a `list` of `Series`."""
+    _require_numpy()
+    if counter not in COUNTERS:
+        raise ValueError('Unknown counter {}, expected one of {}'.format(counter, ', '.join(COUNTERS)))
+    dtype = _record_dtype()
+    series = list()
+    for account in (store.accounts() if accounts is None else accounts):
+        records = numpy.frombuffer(store.range_bytes(account, start, end), dtype=dtype)
+        series.append(Series(account, records['timestamp'], records[counter]))
+    return series
+
+def deltas(series):
+    """Change of the counter since the previous sample, stamped with the later sample's time."""
+    return Series(series.account, series.timestamps[1:], numpy.diff(series.values))
+
+def rolling_rate(series, window=24 * HOUR):
+    """Growth per hour over the `window` seconds before every sample. Samples with nothing earlier
+    in their window are `nan`."""
+    timestamps = series.timestamps
+    first = numpy.searchsorted(timestamps, timestamps - window, side='left')
+    elapsed = (timestamps - timestamps[first]) / HOUR
+    growth = (series.values - series.values[first]).astype(float)
+    rate = numpy.full(len(timestamps), numpy.nan)
+    numpy.divide(growth, elapsed, out=rate, where=elapsed > 0)
+    return Series(series.account, timestamps, rate)
+
+def resample(series, period='daily', utc_offset=0):
+    """The last sample of every `period`(hourly, daily or weekly, or a length in seconds), stamped
+    with the start of the period. Days start at midnight `utc_offset` seconds from UTC."""
+    size = PERIODS[period] if period in PERIODS else int(period)
+    shift = utc_offset + (_WEEK_SHIFT if size == PERIODS['weekly'] else 0)
+    if len(series.timestamps) == 0:
+        return series
+    buckets = (series.timestamps + shift) // size
+    # the samples are sorted by time, so a bucket ends where the next one starts
+    last = numpy.append(numpy.flatnonzero(numpy.diff(buckets)), len(buckets) - 1)
+    return Series(series.account, buckets[last] * size - shift, series.values[last])
+
+def growth(series, period='daily', utc_offset=0):
+    """Growth of the counter in every `period`(see `resample()`), from the end of the one before."""
+    return deltas(resample(series, period, utc_offset))
+
+def gaps(series, interval=HOUR):
+    """Finds stretches without samples. `starts`/`ends` are the samples around each gap and
+    `missing` how many `interval`s are absent in between."""
+    steps = numpy.diff(series.timestamps)
+    idx = numpy.flatnonzero(steps >= interval * _GAP_TOLERANCE)
+    return Gaps(
+        series.account, series.timestamps[idx], series.timestamps[idx + 1],
+        (steps[idx] + interval // 2) // interval - 1
+    )
+
+# ============================ anicration_stats ============================ #
+
+def _local_offset():
+    """Seconds the local timezone is ahead of UTC, the timezone snapshot names use."""
+    return int(datetime.now().astimezone().utcoffset().total_seconds())
+
+def _format_time(timestamp, utc_offset):
+    return (datetime(1970, 1, 1) + timedelta(seconds=int(timestamp) + utc_offset)).strftime('%Y-%m-%d %H:%M')
+
+def _parse_time(value, utc_offset):
+    """'YYYY-MM-DD[ HH:MM]' in the `utc_offset` timezone to unix seconds."""
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            moment = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return int((moment - datetime(1970, 1, 1)).total_seconds()) - utc_offset
+    raise argparse.ArgumentTypeError('Expected YYYY-MM-DD or "YYYY-MM-DD HH:MM", got ' + value)
+
+def _argument_create():
+    parser = argparse.ArgumentParser(
+        prog='anicration_stats',
+        description='Computes growth, rates and gaps of the counters track_twitter_info stores, as CSV.')
+    parser.add_argument(
+        'report', choices=('counters', 'growth', 'rate', 'gaps'),
+        help='counters : the value at the end of every period, growth : its change per period, '
+             'rate : growth per hour over the --window before every sample, gaps : missed hours')
+    parser.add_argument(
+        '-a', '--accounts', nargs='+', default=None, metavar='account',
+        help='Accounts to include. Defaults to every tracked account')
+    parser.add_argument(
+        '-C', '--counter', default='followers_count', choices=COUNTERS,
+        help='Counter to compute on. Defaults to followers_count')
+    parser.add_argument(
+        '-p', '--period', default='daily', choices=sorted(PERIODS),
+        help='Period of counters/growth. Defaults to daily')
+    parser.add_argument(
+        '--window', type=float, default=24, metavar='hours',
+        help='Window of rate in hours. Defaults to 24')
+    parser.add_argument('--start', default=None, metavar='date', help='First day(YYYY-MM-DD[ HH:MM])')
+    parser.add_argument('--end', default=None, metavar='date', help='Day to stop before(YYYY-MM-DD[ HH:MM])')
+    parser.add_argument(
+        '--utc_offset', type=float, default=None, metavar='hours',
+        help='Timezone of the dates and of day boundaries. Defaults to the local one')
+    parser.add_argument(
+        '-o', '--output', default=None, metavar='loc', help='CSV file to write. Defaults to stdout')
+    parser.add_argument(
+        '-s', '--store', default=None, metavar='loc',
+        help='Time-series folder. Defaults to timeseries_location of the config')
+    parser.add_argument(
+        '-c', '--config', default=None, metavar='loc', help='Custom config location')
+    return parser
+
+def _rows(args, series, utc_offset):
+    """CSV rows(after the header) of the report asked for."""
+    if args.report == 'gaps':
+        found = gaps(series)
+        for (start, end, missing) in zip(found.starts, found.ends, found.missing):
+            yield (found.account, _format_time(start, utc_offset), _format_time(end, utc_offset), int(missing))
+        return
+    if args.report == 'counters':
+        result = resample(series, args.period, utc_offset)
+    elif args.report == 'growth':
+        result = growth(series, args.period, utc_offset)
+    else:
+        result = rolling_rate(series, int(args.window * HOUR))
+    for (timestamp, value) in zip(result.timestamps, result.values):
+        if args.report == 'rate':
+            value = '' if numpy.isnan(value) else round(float(value), 4)
+        else:
+            value = int(value)
+        yield (result.account, _format_time(timestamp, utc_offset), value)
+
+def main(argv=None):
+    """Entry point of `anicration_stats`."""
+    args = _argument_create().parse_args(argv)
+    _require_numpy()
+    utc_offset = _local_offset() if args.utc_offset is None else int(args.utc_offset * HOUR)
+    if args.store is None:
+        from .confighandler import ConfigHandler
+        args.store = ConfigHandler(args.config).timeseries_loc
+    store = TimeSeriesStore(args.store)
+    start = None if args.start is None else _parse_time(args.start, utc_offset)
+    end = None if args.end is None else _parse_time(args.end, utc_offset)
+    accounts = None if args.accounts is None else [account.lstrip('@') for account in args.accounts]
+    header = ('account', 'start', 'end', 'missing_hours') if args.report == 'gaps' else (
+        'account', 'time', args.counter if args.report == 'counters' else args.counter + '_' + args.report
+    )
+    output = sys.stdout if args.output is None else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        writer = csv.writer(output)
+        writer.writerow(header)
+        for series in load_counters(store, args.counter, accounts, start, end):
+            writer.writerows(_rows(args, series, utc_offset))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    if args.output is not None:
+        print('Saved at', os.path.abspath(args.output))
@@ -10,10 +10,21 @@ import argparse
 import re
 
 from .auxiliaryfuncs import _v_print, _set_verbosity
-from .seiyuuhandler import seiyuu_twitter, twitter_media_downloader, config_create
+from .seiyuuhandler import seiyuu_twitter, twitter_media_downloader, config_create, _open_source
 from .confighandler import ConfigHandler
-from .downloader import _requests_save, _file_parser, _media_request, _get_media_name, _folder_check_empty
+from .httpsession import configure_session, connection_report
+from .httpcache import configure_cache, cache_report
+from .ratelimit import configure_limiter, configure_bandwidth, BudgetExhausted
+from .downloader import _file_parser, _get_media_name, _folder_check_empty
+from .downloader import _resume_download, _manifest_record, _duplicate_check, _SuffixIndex
+from .manifest import Manifest, _known_at, _copy_known
+from .checkpoint import CheckpointStore
+from .archive import ARCHIVE_FORMATS
+from .verify import verify_library, prune_library
+from .timeseries import TimeSeriesStore, import_user_data
+from .reindex import reindex
 import anicration.downloader as downloader
+import anicration.asyncdownloader as asyncdownloader
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -46,6 +57,20 @@ def argument_create():
         '-T', '--textfile',
         action='store_true', default=None,
         help='Text file mode. Seperate links by new line in the file.')
+    section.add_argument(
+        '-V', '--verify',
+        action='store_true', default=None,
+        help='Verify mode. Re-checks the size and hash of downloaded files(under a folder if given).')
+    section.add_argument(
+        '-R', '--reindex',
+        action='store_true', default=None,
+        help='Re-index mode. Rewrites the link logs of every archive under json_loc(or a folder if given) '
+             'with a process per core, only parsing new or changed archives(--full parses all).')
+    section.add_argument(
+        '-U', '--import_user_data',
+        action='store_true', default=None,
+        help='Import mode. Adds the user_data-*.json files of track_twitter_info(in a folder if given, '
+             'defaults to the current one) to the time-series store.')
 
     store_type = parser.add_mutually_exclusive_group()
     store_type.add_argument(
@@ -97,6 +122,85 @@ def argument_create():
         '-o', '--output',
         type=str, nargs='?', const=None, default=None, metavar='loc',
         help="where to save the file(default : current directory)")
+    parser.add_argument(
+        '-w', '--workers',
+        type=int, default=None, metavar='int',
+        help='How many media files to download at once. Defaults to the config value(1)')
+    parser.add_argument(
+        '-E', '--engine',
+        type=str, choices=('threads', 'asyncio'), default='threads',
+        help='Download engine. asyncio(requires aiohttp) suits very large link lists')
+    parser.add_argument(
+        '--no_manifest',
+        action='store_true', default=False,
+        help='Ignore the download manifest, only check the output folder for existing files')
+    parser.add_argument(
+        '--prune',
+        action='store_true', default=False,
+        help='[Verify mode] Forget missing, truncated and corrupted files in the manifest(deleting '
+             'the damaged ones), so the next run downloads them again')
+    parser.add_argument(
+        '--no_cache',
+        action='store_true', default=False,
+        help='Skip the HTTP cache, no conditional requests are sent')
+    parser.add_argument(
+        '--host_limit',
+        type=int, default=None, metavar='int',
+        help='Maximum connections per host when downloading concurrently. Defaults to the config value')
+    sync = parser.add_mutually_exclusive_group()
+    sync.add_argument(
+        '--incremental',
+        dest='incremental', action='store_true', default=None,
+        help='Only fetch tweets newer than the last sync of the account')
+    sync.add_argument(
+        '--full',
+        dest='incremental', action='store_false', default=None,
+        help='Fetch the whole timeline again, ignoring the last sync')
+    sync.add_argument(
+        '--backfill',
+        action='store_true', default=False,
+        help='Fetch the whole history page by page, resuming where an interrupted backfill stopped')
+    projection = parser.add_mutually_exclusive_group()
+    projection.add_argument(
+        '--projection',
+        dest='projection', action='store_true', default=None,
+        help='Strip statuses to the fields media parsing needs(plus projection_fields of the config)')
+    projection.add_argument(
+        '--no_projection',
+        dest='projection', action='store_false', default=None,
+        help='Keep statuses whole')
+    parser.add_argument(
+        '--raw_archive',
+        action='store_true', default=None,
+        help='With --projection, still save the statuses whole')
+    parser.add_argument(
+        '--archive_format',
+        type=str, choices=ARCHIVE_FORMATS, default=None,
+        help='How JSON responses are saved(jsonl.gz/jsonl.xz are compressed). Defaults to the config value')
+    parser.add_argument(
+        '--parallel',
+        type=int, default=None, metavar='int',
+        help='[Anicration mode] How many accounts to fetch at the same time. Defaults to the config value')
+    parser.add_argument(
+        '--replay',
+        type=str, default=None, metavar='loc',
+        help='Serve timelines from responses recorded with --record instead of Twitter(no keys needed)')
+    parser.add_argument(
+        '--record',
+        type=str, default=None, metavar='loc',
+        help='Save every Twitter API response into this folder, to be used with --replay')
+    parser.add_argument(
+        '--replay_latency',
+        type=float, default=0.0, metavar='sec',
+        help='Seconds every replayed API call takes. Defaults to 0')
+    parser.add_argument(
+        '--limit_rate',
+        type=float, default=None, metavar='KB/s',
+        help='Total download speed in KB/s(0 for no limit). Defaults to the config value')
+    parser.add_argument(
+        '--byte_budget',
+        type=float, default=None, metavar='MB',
+        help='Stop after downloading this many MB, the links left are saved to resume with -T')
 
     parser.add_argument(
         "website",
@@ -153,12 +257,35 @@ def _files_to_save(args, payload):
     return payload
 
 def _get_mode(args, payload, config):
-    if args.twitter:
+    if args.verify:
+        print('Verify mode...')
+        manifest = payload['manifest'] if payload['manifest'] is not None else Manifest(config.manifest_loc)
+        problems = verify_library(manifest, args.website, args.workers)
+        if problems and args.prune:
+            prune_library(manifest, problems)
+        elif problems:
+            _v_print('Run again with --prune to download them again.', verbosity=0)
+            sys.exit(1)
+    elif args.reindex:
+        print('Re-index mode...')
+        json_loc = args.website if args.website else _folder_check_empty(config.json_loc, 'Downloader', 'json')
+        log_loc = args.output if args.output else _folder_check_empty(config.log_loc, 'Downloader', 'log')
+        reindex(json_loc, log_loc, args.workers, full=args.incremental is False)
+    elif args.import_user_data:
+        print('Import mode...')
+        store = TimeSeriesStore(config.timeseries_loc)
+        added = import_user_data(store, [args.website if args.website else os.getcwd()])
+        _v_print('Imported', added, 'new samples into', store.folder, verbosity=0)
+    elif args.twitter:
         print('Twitter mode...')
         payload['auth_keys'] = config.auth_keys
         if args.verbose >= 2:
             _print_payload(payload)
         try:
+            # authenticated once for every username
+            payload['api'] = _open_source(
+                config.auth_keys, args.replay, args.record, args.replay_latency
+            )
             if args.website is None and len(config.twitter_usernames) != 1:
                 for username in config.twitter_usernames:
                     payload['twitter_id'] = username
@@ -170,9 +297,11 @@ def _get_mode(args, payload, config):
             sys.exit(1)
         else:
             print('Complete')
-    elif args.instagram:
+            connection_report()
+            cache_report()
+    elif getattr(args, 'instagram', None):
         print("Instagram mode...")
-    elif args.blog:
+    elif getattr(args, 'blog', None):
         print("Blog mode...")
     elif args.textfile:
         print('Textfile mode...')
@@ -182,25 +311,56 @@ def _get_mode(args, payload, config):
             txtf_name = args.website
             print(txtf_name)
             try:
-                textfile_handler(
-                    txtf_name, save_location=' '.join(payload['location']), override=config.override
-                )
+                if args.engine == 'asyncio':
+                    if config.override is True:
+                        _v_print(
+                            'The asyncio engine does not compare existing files(override).',
+                            verbosity='WARN', level=logger.warning
+                        )
+                    asyncdownloader.parser_downloader(
+                        txtf_name,
+                        _folder_check_empty(payload['location'], 'Anicration', 'Pics', True),
+                        payload['workers'], payload['host_limit'], payload['manifest']
+                    )
+                else:
+                    textfile_handler(
+                        txtf_name, save_location=' '.join(payload['location']), override=config.override,
+                        manifest=payload['manifest']
+                    )
             except FileNotFoundError as err:
                 sys.exit('File does not exist, exiting program : ' + err)
             except KeyboardInterrupt:
                 sys.exit('ERROR : User interrupted the program.')
             else:
                 print('\nComplete')
+                connection_report()
+                cache_report()
     elif args.anicration:
         print('Anicration mode...')
         if args.website:
             print('ERROR : ', args.website, ' is provided on Anicration mode.')
+        manifest = payload['manifest']
+        checkpoints, incremental = payload['checkpoints'], payload['incremental']
         payload = dict()
         payload['create_config'] = False
         if args.items:
             payload['items'] = args.items
         payload = _files_to_save(args, payload)
         payload = _store_type(args, payload, os.getcwd())
+        payload['workers'] = args.workers
+        payload['host_limit'] = args.host_limit
+        payload['engine'] = args.engine
+        payload['manifest'] = manifest
+        payload['checkpoints'] = checkpoints
+        payload['incremental'] = incremental
+        payload['backfill'] = args.backfill
+        payload['parallel'] = args.parallel
+        payload['archive_format'] = args.archive_format
+        payload['projection'] = args.projection
+        payload['raw_archive'] = args.raw_archive
+        payload['replay'] = args.replay
+        payload['record'] = args.record
+        payload['replay_latency'] = args.replay_latency
         if args.verbose >= 2:
             _print_payload(payload)
         seiyuu_twitter(None, **payload)
@@ -212,34 +372,72 @@ def textfile_handler(file, **kwargs):
         save_loc = _folder_check_empty(
             kwargs.pop('save_location', None), 'Anicration', 'Pics', True
         )
+        manifest = kwargs.pop('manifest', None)
+        known = dict()
+        if manifest is not None:
+            known = manifest.lookup(_get_media_name(link) for link in links)
+        # (n) suffixes of the folder, only listed once the first duplicate turns up
+        suffixes = None
         length = len(links)
         for (idx, link) in enumerate(links):
+            if downloader.get_bandwidth().exhausted:
+                downloader._budget_stop(links[idx:], save_loc)
+                break
             percent = downloader._percent_former((idx+1), length)
             name = _get_media_name(link)
-            if os.path.exists(os.path.join(save_loc, name)) and kwargs['override'] is True:
-                with open(os.path.join(save_loc, name), 'r+b') as pic_f:
-                    res = _media_request(link)
-                    if res.content == pic_f.read():
-                        message = 'File ' + name + ' already exists.'
-                        downloader._status_print(message, percent, save_loc)
-                    else:
-                        i = 1
-                        file_name, fext = os.path.splitext(name)
-                        file_path = os.path.join(save_loc, file_name + '({})'.format(str(i)) + fext)
-                        while os.path.exists(file_path):
-                            i = i+1
-                            file_path = os.path.join(save_loc, file_name + '({})'.format(str(i)) + fext)
-                        else:
-                            with open(file_path, 'wb') as new_f:
-                                new_f.write(res.content)
-            elif os.path.exists(os.path.join(save_loc, name)) and kwargs['override'] is False:
+            file_save_path = os.path.join(save_loc, name)
+            exists = _known_at(known, name, file_save_path, manifest) or os.path.exists(file_save_path)
+            if exists and kwargs['override'] is True:
+                local_digest = None
+                for entry in known.get(name, ()):
+                    if entry.path == os.path.abspath(file_save_path):
+                        local_digest = entry.sha256
+                if suffixes is None:
+                    suffixes = _SuffixIndex(save_loc)
+                new_path = suffixes.next_path(name)
+                try:
+                    identical = _duplicate_check(link, file_save_path, new_path, local_digest)
+                except BudgetExhausted:
+                    downloader._budget_stop(links[idx:], save_loc)
+                    break
+                except (downloader.IncompleteDownloadError, downloader.DownloadError) as err:
+                    downloader._status_print(str(err), percent, save_loc)
+                    continue
+                if identical:
+                    message = 'File ' + name + ' already exists.'
+                else:
+                    suffixes.taken(name)
+                    message = 'File ' + name + ' differs, saved as ' + os.path.basename(new_path)
+                downloader._status_print(message, percent, save_loc)
+            elif exists and kwargs['override'] is False:
                 message = 'File with the name' + name + ' already exists.'
                 downloader._status_print(message, percent, save_loc)
             else:
+                entry = _copy_known(known, name, file_save_path)
+                if entry is not None:
+                    message = 'Copied ' + name + ' from an earlier download.'
+                    downloader._status_print(message, percent, save_loc)
+                    _manifest_record(manifest, link, file_save_path, entry)
+                    continue
                 message = 'Downloading : ' + link[-20:]
                 downloader._status_print(message, percent, save_loc)
-                res = _media_request(link)
-                _requests_save(res, os.path.join(save_loc, name))
+                try:
+                    save_result = _resume_download(link, file_save_path)
+                except BudgetExhausted:
+                    downloader._budget_stop(links[idx:], save_loc)
+                    break
+                except (downloader.IncompleteDownloadError, downloader.DownloadError) as err:
+                    downloader._status_print(str(err), percent, save_loc)
+                else:
+                    _manifest_record(manifest, link, file_save_path, save_result=save_result)
+        if manifest is not None:
+            manifest.flush()
+
+def _open_manifest(args, config):
+    """Opens the download manifest, `None` if it's disabled(--no_manifest or config)."""
+    if args.no_manifest or config.manifest is False:
+        return None
+    return Manifest(config.manifest_loc)
 
 def _print_payload(payload):
     """Prints payload dict() for debug purposes."""
@@ -349,9 +547,38 @@ def args_handler(args):
     payload['website'] = args.website
     payload['location'] = args.output
     payload['config'] = args.config
+    payload['engine'] = args.engine
+    if args.workers is not None:
+        payload['workers'] = args.workers
+    else:
+        # the asyncio engine has its own default, config workers is meant for threads
+        payload['workers'] = None if args.engine == 'asyncio' else config.workers
+    payload['host_limit'] = args.host_limit if args.host_limit is not None else config.host_limit
+    configure_session(max(config.pool_size, payload['workers'] or 1), config.timeout)
+    configure_limiter(config.requests_per_second, config.burst, config.max_retries)
+    configure_bandwidth(
+        (args.limit_rate if args.limit_rate is not None else config.max_bandwidth) * 1024,
+        (args.byte_budget if args.byte_budget is not None else config.byte_budget) * 1024**2
+    )
+    payload['manifest'] = _open_manifest(args, config)
+    payload['checkpoints'] = CheckpointStore(config.checkpoint_loc)
+    payload['incremental'] = config.incremental if args.incremental is None else args.incremental
+    payload['backfill'] = args.backfill
+    payload['archive_format'] = args.archive_format if args.archive_format is not None else config.archive_format
+    payload['projection'] = config.projection if args.projection is None else args.projection
+    payload['projection_fields'] = tuple(config.projection_fields)
+    payload['raw_archive'] = config.raw_archive if args.raw_archive is None else args.raw_archive
+    configure_cache(
+        config.http_cache_loc, config.http_cache_size * 1024**2,
+        enabled=config.http_cache is True and not args.no_cache
+    )
 
     #triggers
-    _get_mode(args, payload, config)
+    try:
+        _get_mode(args, payload, config)
+    finally:
+        if payload['manifest'] is not None:
+            payload['manifest'].close()
     return payload
 
 def main():
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Reads and writes the JSON archives of Twitter API responses.
+`ArchiveWriter` appends statuses as they arrive, either as one status per line(JSONL, optionally
+gzip/xz compressed) or as the indented JSON array older versions saved.
+`iter_archive()` reads any of them back one status at a time, whatever the format; JSON arrays
+are decoded incrementally too, so an archive larger than memory can still be read.
+"""
+import gzip
+import lzma
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+ARCHIVE_FORMATS = ('json', 'jsonl', 'jsonl.gz', 'jsonl.xz')
+# characters read at a time from a JSON array archive
+READ_CHUNK = 64 * 1024
+_WHITESPACE = ' \t\n\r'
+_MAGIC = (
+    (b'\x1f\x8b', gzip.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+)
+
+def archive_path(base_path, archive_format='json'):
+    """`base_path` with the extension of `archive_format`."""
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError('Unknown archive format {}, expected one of {}'.format(
+            archive_format, ', '.join(ARCHIVE_FORMATS)
+        ))
+    return base_path + '.' + archive_format
+
+def _open_text(path, mode):
+    """Opens `path` as text, (de)compressing by extension when writing and by content when reading."""
+    if 'r' in mode:
+        with open(path, 'rb') as file:
+            head = file.read(6)
+        for (magic, opener) in _MAGIC:
+            if head.startswith(magic):
+                return opener(path, mode + 't', encoding='utf-8')
+    elif path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    elif path.endswith('.xz'):
+        return lzma.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+class ArchiveWriter():
+    """Streams statuses into `path`, the format follows its extension(see `archive_path()`).
+    Nothing is buffered beyond the page being written; the file is only created on the first write,
+    so an empty timeline leaves no file behind."""
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = not path.endswith('.json')
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, statuses):
+        """Appends an iterable of statuses(`dict`)."""
+        for status in statuses:
+            if self._file is None:
+                self._file = _open_text(self.path, 'w')
+                if not self.jsonl:
+                    self._file.write('[\n')
+            if self.jsonl:
+                self._file.write(json.dumps(status, ensure_ascii=False, separators=(',', ':')))
+                self._file.write('\n')
+            else:
+                if self.count:
+                    self._file.write(',\n')
+                self._file.write(json.dumps(status, sort_keys=True, indent=4, ensure_ascii=False))
+            self.count = self.count + 1
+
+    def close(self):
+        if self._file is not None:
+            if not self.jsonl:
+                self._file.write('\n]')
+            self._file.close()
+            self._file = None
+            logger.info('Archived %d statuses at %s', self.count, self.path)
+
+def _iter_json_array(file, chunk_size=READ_CHUNK):
+    """Yields the values of a JSON array from `file`(opened as text, positioned after the '['),
+    decoding one value at a time. Only the unread part of the current chunk and the value being
+    decoded are held in memory."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+    read_size = chunk_size
+    while True:
+        # skip to the next value
+        while pos < len(buffer) and (buffer[pos] in _WHITESPACE or buffer[pos] == ','):
+            pos = pos + 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        value, end = None, None
+        if pos < len(buffer):
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise
+        # a value ending at the end of the buffer may continue in the next chunk(e.g. a number)
+        if end is None or (end == len(buffer) and not eof):
+            if eof:
+                raise ValueError('Unterminated JSON array in ' + getattr(file, 'name', 'archive'))
+            chunk = file.read(read_size)
+            eof = chunk == ''
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            # a value larger than a chunk : read more at once, so it isn't decoded over and over
+            read_size = read_size * 2
+            continue
+        read_size = chunk_size
+        yield value
+        pos = end
+
+def iter_archive(path):
+    """Yields the statuses of an archive : a JSON array or JSONL, plain, gzip or xz."""
+    with _open_text(path, 'r') as file:
+        first = ''
+        while first == '' or first.isspace():
+            first = file.read(1)
+            if first == '':
+                return
+        if first == '[':
+            for status in _iter_json_array(file):
+                yield status
+            return
+        line = first + file.readline()
+        while line:
+            if line.strip():
+                yield json.loads(line)
+            line = file.readline()
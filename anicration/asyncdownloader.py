@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio alternative to `downloader`, meant for very large link lists(textfile mode).
+Offers the same `pic_downloader()`/`parser_downloader()` entry points and follows the same
+naming, skip-if-exists and `.part` resume rules, but keeps thousands of requests in flight
+from a single thread. Requires the optional `aiohttp` dependency.
+"""
+import os
+import asyncio
+import hashlib
+import logging
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .downloader import DownloadResult, SaveResult, IncompleteDownloadError, PART_SUFFIX
+from .downloader import _folder_check_empty, _file_parser, _media_precheck
+from .downloader import _media_link, _part_size, _resume_check, _part_finish, _manifest_record
+from .downloader import _percent_former, _status_print, _result_message, _failed_report
+from .downloader import _stopped_report, _tweet_result
+from .manifest import _copy_known, _hash_file
+from .mediaparser import _media_record
+from .httpsession import get_timeout
+from .httpcache import get_cache
+from .ratelimit import get_limiter, get_bandwidth, retry_after, RETRY_STATUSES, BudgetExhausted
+from .auxiliaryfuncs import _v_print
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# requests in flight when no amount of workers is given
+DEFAULT_CONCURRENCY = 100
+_END = object()
+
+def _require_aiohttp():
+    if aiohttp is None:
+        raise ImportError('The asyncio engine requires aiohttp. Install it with "pip install aiohttp".')
+
+def _client_timeout():
+    """Converts the shared session's timeout into `aiohttp.ClientTimeout`."""
+    timeout = get_timeout()
+    if isinstance(timeout, (tuple, list)):
+        connect, read = timeout
+    else:
+        connect = read = timeout
+    return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+
+async def _media_fetch(session, record, save_location, manifest=None, known=None):
+    """Downloads a single photo/video(`MediaRecord`). Returns a `DownloadResult` instead of raising."""
+    skipped = _media_precheck(record, save_location, known, manifest)
+    if skipped is not None:
+        return skipped
+    media = record.url
+    media_name = record.media_name
+    media_link = _media_link(record)
+    file_save_path = os.path.join(save_location, media_name)
+    if known:
+        entry = _copy_known(known, media_name, file_save_path)
+        if entry is not None:
+            _manifest_record(manifest, record, file_save_path, entry)
+            return DownloadResult(media, media_name, 'copied', None, entry.size, entry.sha256)
+    bandwidth = get_bandwidth()
+    if bandwidth.exhausted:
+        return DownloadResult(media, media_name, 'stopped', None)
+    cache = get_cache()
+    conditional = cache is not None
+    limiter = get_limiter()
+    budget = limiter.budget()
+    while True:
+        offset = _part_size(file_save_path)
+        if offset > 0:
+            headers = {'Range': 'bytes={}-'.format(offset)}
+        else:
+            headers = cache.validators(media_link) if conditional else None
+        await asyncio.sleep(limiter.reserve(media_link))
+        wait = None
+        try:
+            async with session.get(media_link, headers=headers) as res:
+                if res.status == 304:
+                    restored = cache.restore(media_link, file_save_path)
+                    if restored is None:
+                        # the cached body is gone, ask again without validators
+                        conditional = False
+                        continue
+                    save_result = SaveResult(file_save_path, *restored)
+                    _manifest_record(manifest, record, file_save_path, save_result=save_result)
+                    return DownloadResult(
+                        media, media_name, 'downloaded', None, save_result.size, save_result.sha256
+                    )
+                if res.status >= 400 and not (res.status == 416 and offset > 0):
+                    # 416 answers a Range request and is handled by _resume_check()
+                    wait = retry_after(res.headers)
+                    if wait is not None and res.status in (429, 503):
+                        limiter.throttled(media_link, wait)
+                    res.raise_for_status()
+                offset, expected = _resume_check(res.status, res.headers, file_save_path)
+                digest = hashlib.sha256()
+                if offset:
+                    _hash_file(digest, file_save_path + PART_SUFFIX)
+                if res.status != 416:
+                    with open(file_save_path + PART_SUFFIX, 'ab' if offset else 'wb') as save_data:
+                        async for chunk in res.content.iter_chunked(100000):
+                            digest.update(chunk)
+                            save_data.write(chunk)
+                            await asyncio.sleep(bandwidth.reserve(len(chunk)))
+            save_result = SaveResult(
+                file_save_path, _part_finish(file_save_path, expected), digest.hexdigest()
+            )
+            if cache is not None:
+                cache.store(
+                    media_link, res.headers, file_save_path, save_result.size, save_result.sha256
+                )
+            _manifest_record(manifest, record, file_save_path, save_result=save_result)
+        except BudgetExhausted:
+            return DownloadResult(media, media_name, 'stopped', None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, IncompleteDownloadError) as err:
+            # a body cut short is resumed from the .part file on the next attempt
+            refused = (
+                isinstance(err, aiohttp.ClientResponseError) and err.status not in RETRY_STATUSES
+            )
+            if refused or not budget.spend():
+                logger.error('Failed to download %s : %s', media_link, err)
+                return DownloadResult(media, media_name, 'failed', err)
+            delay = limiter.backoff.delay(budget.used, wait)
+            logger.warning('Retrying %s in %.1fs : %s', media_link, delay, err)
+            await asyncio.sleep(delay)
+        except OSError as err:
+            logger.error('Failed to download %s : %s', media_link, err)
+            return DownloadResult(media, media_name, 'failed', err)
+        else:
+            return DownloadResult(
+                media, media_name, 'downloaded', None, save_result.size, save_result.sha256
+            )
+
+async def _media_stream(batches, save_location, workers, host_limit, manifest=None, length=None):
+    """Runs `workers` coroutines that pull links off one shared queue, fed from `batches`(an
+    iterable of `list`s of `MediaRecord` or links, e.g. one per timeline page). One session serves
+    the whole stream, so keep-alive carries across batches, and only `workers` downloads exist at a
+    time however many links come. Batches are taken in an executor thread, an iterator waiting on
+    its next batch doesn't hold up the downloads in flight.
+    Progress is out of `length` if given, else of the links received so far."""
+    loop = asyncio.get_event_loop()
+    batches = iter(batches)
+    results = list()
+    done = 0
+    queue = asyncio.Queue(maxsize=workers)
+    connector = aiohttp.TCPConnector(limit=workers, limit_per_host=host_limit or 0)
+    async with aiohttp.ClientSession(connector=connector, timeout=_client_timeout()) as session:
+        async def _feeder():
+            while True:
+                batch = await loop.run_in_executor(None, next, batches, _END)
+                if batch is _END:
+                    break
+                records = [_media_record(media) for media in batch]
+                known = None
+                if manifest is not None:
+                    known = manifest.lookup(record.media_name for record in records)
+                for record in records:
+                    results.append(None)
+                    await queue.put((len(results) - 1, record, known))
+            for _ in range(workers):
+                await queue.put(None)
+        async def _worker():
+            nonlocal done
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                (idx, record, known) = item
+                result = _tweet_result(
+                    record, await _media_fetch(session, record, save_location, manifest, known)
+                )
+                results[idx] = result
+                done = done + 1
+                _status_print(_result_message(result), _percent_former(done, length or len(results)), None)
+        try:
+            await asyncio.gather(_feeder(), *(_worker() for _ in range(workers)))
+        finally:
+            if manifest is not None:
+                manifest.flush()
+    return results
+
+def _run_stream(batches, save_location, workers, host_limit, manifest, length=None):
+    _require_aiohttp()
+    _folder_check_empty(save_location)
+    workers = workers or DEFAULT_CONCURRENCY
+    if length is not None:
+        workers = max(min(workers, length), 1)
+    return asyncio.run(_media_stream(batches, save_location, workers, host_limit, manifest, length))
+
+def pic_downloader(twimg_list: list, save_location=None, workers=None, host_limit=None,
+                   manifest=None, report=True):
+    """Checks if the folder is empty before initiating download.
+    `report=False` leaves the failed/stopped reports to the caller(e.g. when called per batch).
+    Returns a `list` of `DownloadResult`, one for each link(in the order given)."""
+    twimg_list = list(twimg_list)
+    results = _run_stream((twimg_list,), save_location, workers, host_limit, manifest, len(twimg_list))
+    if report is True:
+        _failed_report(results)
+        _stopped_report(results, save_location)
+    return results
+
+def stream_downloader(batches, save_location=None, workers=None, host_limit=None, manifest=None,
+                      report=True):
+    """`pic_downloader()` for a stream of link lists, e.g. the pages of a timeline as they're parsed.
+    A single event loop and session serve the whole stream.
+    Returns a `list` of `DownloadResult`, one for each link(in the order received)."""
+    results = _run_stream(batches, save_location, workers, host_limit, manifest)
+    if report is True:
+        _failed_report(results)
+        _stopped_report(results, save_location)
+    return results
+
+def parser_downloader(file, save_location=None, workers=None, host_limit=None, manifest=None):
+    """File refers to the the file that contains the links.
+    Returns a `list` of `DownloadResult`, one for each link."""
+    with open(file, 'r', encoding='utf-8') as link_file:
+        links_list = _file_parser(link_file)
+    results = pic_downloader(links_list, save_location, workers, host_limit, manifest)
+    _v_print('\nCompleted')
+    return results
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Per-account timeline checkpoints(JSON), so a sync only asks Twitter for what it hasn't seen.
+`since_id` is the newest status id fetched for an account; incremental runs only request
+statuses newer than it instead of walking the timeline from the top every time.
+"""
+import os
+import json
+import time
+import logging
+import threading
+
+from .confighandler import DEFAULT_CONFIG_PATH
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.dirname(DEFAULT_CONFIG_PATH), 'checkpoints.json')
+
+def _account_key(twitter_id):
+    """'@Anju_Inami' and 'anju_inami' share a checkpoint."""
+    return twitter_id.lstrip('@').lower()
+
+class CheckpointStore():
+    """Checkpoints of every account, written to disk on each update. Thread safe."""
+    def __init__(self, path=None):
+        self.path = DEFAULT_CHECKPOINT_PATH if path is None or path == '' else path
+        self._lock = threading.Lock()
+        self._accounts = dict()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    self._accounts = json.load(file)
+            except ValueError:
+                logger.exception('Unreadable checkpoint file %s, starting over', self.path)
+
+    def get(self, twitter_id):
+        """Returns a copy of the checkpoint `dict` of an account(empty if it has none)."""
+        with self._lock:
+            return dict(self._accounts.get(_account_key(twitter_id), ()))
+
+    def since_id(self, twitter_id):
+        """Newest status id fetched for an account, `None` if it was never synced."""
+        return self.get(twitter_id).get('since_id')
+
+    def update(self, twitter_id, **values):
+        """Sets `values` on an account's checkpoint and saves the file.
+        `since_id` only ever moves forward."""
+        key = _account_key(twitter_id)
+        with self._lock:
+            checkpoint = self._accounts.setdefault(key, dict())
+            since_id = values.pop('since_id', None)
+            if since_id is not None and since_id > (checkpoint.get('since_id') or 0):
+                checkpoint['since_id'] = since_id
+            checkpoint.update(values)
+            checkpoint['updated_at'] = time.time()
+            self._save()
+
+    def _save(self):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        # written aside and swapped in, an interrupted save never leaves a broken file
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(self._accounts, file, indent=4, sort_keys=True)
+        os.replace(self.path + '.tmp', self.path)
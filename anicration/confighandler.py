@@ -16,6 +16,8 @@ logger.setLevel(logging.DEBUG)
 
 SEIYUU_NAMES = ('inami_anju', 'saito_shuka', 'aida_rikako', 'kobayashi_aika', 'takatsuki_kanako',
                 'suzuki_aina', 'suwa_nanaka', 'komiya_arisa', 'furihata_ai')
+TRACKED_ACCOUNTS = ('@anju_inami, @saito_shuka, @Rikako_Aida, @aikyan_, @aina_suzuki723, '
+                    '@suwananaka, @box_komiyaarisa, @furihata_ai, @kanako_tktk')
 DEFAULT_CONFIG_PATH = os.path.join(os.getenv('APPDATA'), 'anicration', 'config.txt')
 def _str_parser(str_list, seperator=',', strip=True, pop_check=False):
     """Converts a sets of inputs with a common seperator. strip applies `str.strip()` to all values
@@ -53,9 +55,43 @@ class ConfigHandler():
         self.parser = config.getboolean('Seiyuu Twitter', 'parser')
         self.downloader = config.getboolean('Seiyuu Twitter', 'downloader')
         self.log = config.getboolean('Seiyuu Twitter', 'log')
+        self.parallel_accounts = config.getint('Seiyuu Twitter', 'parallel_accounts', fallback=1)
 
         self.override = config.getboolean('General', 'override')
         self.items = config.getint('TWITTER', 'items')
+        self.incremental = config.getboolean('TWITTER', 'incremental', fallback=False)
+        # user_timeline calls allowed per 15 minutes, shared by every account
+        self.timeline_calls = config.getint('TWITTER', 'timeline_calls', fallback=900)
+        # accounts whose user data track_twitter_info saves every hour
+        self.tracked_accounts = _str_parser(
+            config.get('TWITTER', 'tracked_accounts', fallback=TRACKED_ACCOUNTS), pop_check=True
+        )
+        # strips statuses to the fields the media parser reads(plus projection_fields) as they arrive,
+        # raw_archive still saves them whole
+        self.projection = config.getboolean('TWITTER', 'projection', fallback=False)
+        self.projection_fields = [
+            field for field in _str_parser(config.get('TWITTER', 'projection_fields', fallback='')) if field
+        ]
+        self.raw_archive = config.getboolean('TWITTER', 'raw_archive', fallback=False)
+        # the hourly user_data-<timestamp>.json files, next to the time-series store
+        self.user_data_json = config.getboolean('TWITTER', 'user_data_json', fallback=True)
+        # fallbacks keep configs generated by older versions working
+        self.workers = config.getint('General', 'workers', fallback=1)
+        self.host_limit = config.getint('General', 'host_limit', fallback=4)
+        self.pool_size = config.getint('General', 'pool_size', fallback=10)
+        self.timeout = config.getfloat('General', 'timeout', fallback=60.0)
+        self.manifest = config.getboolean('General', 'manifest', fallback=True)
+        self.http_cache = config.getboolean('General', 'http_cache', fallback=True)
+        self.requests_per_second = config.getfloat('General', 'requests_per_second', fallback=0.0)
+        self.burst = config.getint('General', 'burst', fallback=0)
+        self.max_retries = config.getint('General', 'max_retries', fallback=4)
+        # json, jsonl, jsonl.gz or jsonl.xz
+        self.archive_format = config.get('General', 'archive_format', fallback='json').strip()
+        # in KB/s and MB
+        self.max_bandwidth = config.getfloat('General', 'max_bandwidth', fallback=0.0)
+        self.byte_budget = config.getfloat('General', 'byte_budget', fallback=0.0)
+        # in MB
+        self.http_cache_size = config.getint('General', 'http_cache_size', fallback=2048)
         
     @property
     def twitter_id_loc(self):
@@ -102,6 +138,26 @@ class ConfigHandler():
         """Saves log or parsed links."""
         return self._config['PATHS']['log_save_location'].strip()
 
+    @property
+    def manifest_loc(self):
+        """Path of the download manifest. Empty means next to the default config file."""
+        return self._config.get('PATHS', 'manifest_location', fallback='').strip()
+
+    @property
+    def http_cache_loc(self):
+        """Folder of the HTTP cache. Empty means next to the default config file."""
+        return self._config.get('PATHS', 'http_cache_location', fallback='').strip()
+
+    @property
+    def checkpoint_loc(self):
+        """Path of the timeline checkpoints. Empty means next to the default config file."""
+        return self._config.get('PATHS', 'checkpoint_location', fallback='').strip()
+
+    @property
+    def timeseries_loc(self):
+        """Folder of the tracked counters. Empty means next to the default config file."""
+        return self._config.get('PATHS', 'timeseries_location', fallback='').strip()
+
     @property
     def pic_loc(self):
         """Path to save the downloaded pictures."""
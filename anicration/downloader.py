@@ -4,19 +4,58 @@ Handles the parsing of links for downloading.
 Provides the necessary information to help with saving of files(names) and status report.
 """
 import os
-import sys
+import re
+import hashlib
 import logging
+import threading
 
 from time import sleep
+from collections import namedtuple, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
 import requests
 
 from .auxiliaryfuncs import _v_print
+from .httpsession import get_session, get_timeout
+from .httpcache import get_cache
+from .ratelimit import get_limiter, get_bandwidth, format_rate, retry_after, RETRY_STATUSES
+from .ratelimit import BudgetExhausted
+from .manifest import _file_digest, _hash_file, _known_at, _copy_known
+from .mediaparser import _media_record
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 FILE_EXTENSIONS = ('.png', '.jpg', '.mp4')
+# links left over when the byte budget runs out, in the textfile(-T) format
+REMAINING_FILE = 'remaining-links.txt'
+
+# status is one of 'downloaded', 'copied', 'exists', 'invalid', 'failed'
+# or 'stopped'(the byte budget ran out first, a `.part` file may be left to resume)
+# error is only set on 'failed'
+# size and sha256 are only set on 'downloaded' and 'copied'
+# tweet_id is the tweet of a parsed `MediaRecord`, so a sync knows which tweets to fetch again
+DownloadResult = namedtuple(
+    'DownloadResult', ['link', 'media_name', 'status', 'error', 'size', 'sha256', 'tweet_id']
+)
+DownloadResult.__new__.__defaults__ = (None, None, None)
+# what _requests_save() wrote : hashed while streaming, no second read of the file
+SaveResult = namedtuple('SaveResult', ['path', 'size', 'sha256'])
+
+class _HostLimiter():
+    """Hands out one semaphore per host, capping simultaneous connections to that host."""
+    def __init__(self, limit):
+        self._limit = limit
+        self._lock = threading.Lock()
+        self._semaphores = dict()
+
+    def __call__(self, link):
+        host = urlsplit(link).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self._limit)
+            return self._semaphores[host]
 
 def _folder_check_empty(folder_location, folder_name='Downloader', type_='pics', make_folder=True):
     """Allows one to create a default folder if input is empty.
@@ -35,10 +74,11 @@ def _folder_check_empty(folder_location, folder_name='Downloader', type_='pics',
             try:
                 os.makedirs(folder_path)
             except FileExistsError:
+                # made by another account in the meantime(`--parallel`)
                 _v_print('Folder already exist : ' + folder_path, verbosity=2)
             else:
                 _v_print('Created folder ' + folder_path, verbosity=1)
-                return os.path.join(folder_path)
+            return os.path.join(folder_path)
     else:
         if not os.path.exists(folder_location):
             if make_folder is False:
@@ -47,6 +87,8 @@ def _folder_check_empty(folder_location, folder_name='Downloader', type_='pics',
             logger.info('Folder ' + folder_location + 'does not exist, making a folder.')
             try:
                 os.makedirs(folder_location)
+            except FileExistsError:
+                _v_print('Folder already exist : ' + folder_location, verbosity=2)
             except PermissionError:
                 logger.critical('No permission to create folder at ' + folder_location)
                 raise
@@ -67,20 +109,113 @@ def _percent_former(curr, leng):
     return percent + ' ' + content
 
 def _status_print(message, percent, save_location):
-    """Prints the status on the downloading session."""
+    """Prints the status on the downloading session, with the current throughput."""
+    rate = get_bandwidth().rate()
+    if rate:
+        percent = '{} {}'.format(percent, format_rate(rate))
     print(percent, 
           ' : ' + save_location if save_location is not None else '', ':',
           message, '    ', end='\r')
     logger.info('%s %s', save_location, message)
 
+class IncompleteDownloadError(IOError):
+    """The saved data does not add up to the size the server announced.
+    The `.part` file is kept so the next run can resume it."""
+
+class DownloadError(IOError):
+    """A request failed for good : its retry budget ran out or the server refused the file."""
+
+PART_SUFFIX = '.part'
+
+def _part_size(file_save_path):
+    """Size of the unfinished `.part` download of a path. 0 if there is none."""
+    try:
+        return os.path.getsize(file_save_path + PART_SUFFIX)
+    except OSError:
+        return 0
+
+def _expected_size(status, headers, offset):
+    """Obtains the total size of the file from Content-Range(206) or Content-Length(200).
+    Returns `None` if the server didn't say."""
+    if status in (206, 416):
+        # Content-Range : bytes 100-199/200 or bytes */200
+        content_range = headers.get('Content-Range', '')
+        total = content_range.rpartition('/')[2]
+        return int(total) if total.isdigit() else None
+    length = headers.get('Content-Length')
+    if length is None or not length.isdigit() or headers.get('Content-Encoding'):
+        return None
+    return int(length) + offset
+
+def _resume_check(status, headers, file_save_path):
+    """Checks a response before its body is written. Returns `(offset, expected_size)`.
+    `offset` is where the body goes in the `.part` file(0 means start over).
+    Raises `IncompleteDownloadError` if the partial file can't be resumed."""
+    offset = _part_size(file_save_path) if status in (206, 416) else 0
+    expected = _expected_size(status, headers, offset)
+    if status == 416:
+        # asked for a range past the end : the .part file may already hold everything
+        if expected is None or offset != expected:
+            os.remove(file_save_path + PART_SUFFIX)
+            raise IncompleteDownloadError(
+                'Unable to resume {}, discarded the partial file.'.format(file_save_path))
+    elif status == 206:
+        start = headers.get('Content-Range', '').split(' ')[-1].partition('-')[0]
+        if start != str(offset):
+            raise IncompleteDownloadError(
+                'Server resumed {} at the wrong offset.'.format(file_save_path))
+    return offset, expected
+
+def _part_finish(file_save_path, expected):
+    """Renames the `.part` file to `file_save_path` once its size matches `expected`.
+    Returns the size of the file."""
+    size = _part_size(file_save_path)
+    if expected is not None and size != expected:
+        raise IncompleteDownloadError(
+            '{} is incomplete ({}/{} bytes).'.format(file_save_path, size, expected))
+    os.replace(file_save_path + PART_SUFFIX, file_save_path)
+    return size
+
 def _requests_save(res_obj, file_save_path, override=False):
-    """Saves a data to a location with open()"""
+    """Streams the response into `file_save_path.part` and renames it once it is complete.
+    A 206(Partial Content) response is appended to the existing `.part` file.
+    Returns a `SaveResult`(sha256 is computed as the chunks are written), `None` if skipped.
+    Raises `IncompleteDownloadError` if the size doesn't match Content-Length/Content-Range or the
+    connection drops mid-body, `BudgetExhausted` if the byte budget runs out(the `.part` file is kept
+    for the next attempt either way)."""
     if os.path.exists(file_save_path) and override is False:
         print('Path already exists. Skip saving the file.')
+        res_obj.close()
+        return None
+    try:
+        offset, expected = _resume_check(res_obj.status_code, res_obj.headers, file_save_path)
+    except IncompleteDownloadError:
+        res_obj.close()
+        raise
+    digest = hashlib.sha256()
+    if offset:
+        # the part downloaded by an earlier run is the only data that gets read back
+        _hash_file(digest, file_save_path + PART_SUFFIX)
+    if res_obj.status_code == 416:
+        res_obj.close()
     else:
-        with open(file_save_path, 'wb') as save_data:
-            for chunk in res_obj.iter_content(100000):
-                save_data.write(chunk)
+        bandwidth = get_bandwidth()
+        with open(file_save_path + PART_SUFFIX, 'ab' if offset else 'wb') as save_data:
+            try:
+                for chunk in res_obj.iter_content(100000):
+                    digest.update(chunk)
+                    save_data.write(chunk)
+                    bandwidth.consume(len(chunk))
+            except BudgetExhausted:
+                res_obj.close()
+                raise
+            except requests.RequestException as err:
+                # e.g. ChunkedEncodingError : the connection dropped before the whole body came
+                res_obj.close()
+                raise IncompleteDownloadError(
+                    'Connection lost while saving {} : {}'.format(file_save_path, err)) from err
+    size = _part_finish(file_save_path, expected)
+    return SaveResult(file_save_path, size, digest.hexdigest())
 
 def _file_parser(file_obj):
     """Turn a list seperated by newline into a list with only links"""
@@ -95,65 +230,376 @@ def _file_parser(file_obj):
     return parsed_list
 
 def _get_media_name(link):
-    """Find the first slash from last. Returns anything AFTER the found slash."""
-    for j in range(len(link)-1, 0, -1):
-        if link[j] == '/':
-            return link[abs(j) + 1:]
-
-def _media_request(link):
-    """Requests links, handle HTTPError or ConnectionError up to 3 retries"""
-    retry = 1
-    while retry != 3:
+    """Find the first slash from last. Returns anything AFTER the found slash.
+    Parsed links carry theirs already(`MediaRecord.media_name`)."""
+    idx = link.rfind('/')
+    if idx > 0:
+        return link[idx + 1:]
+
+def _media_request(link, headers=None, conditional=False, budget=None):
+    """Requests links through the shared session, paced by the shared rate limiter.
+    Connection errors, timeouts, 429 and 5xx are retried with exponential backoff and jitter,
+    a Retry-After pauses every request to that host. `budget` is the `RetryBudget` of the file.
+    The response is streamed, so its content has to be consumed(or closed) to free the connection.
+    `conditional` sends the validators of the HTTP cache, the caller has to handle a 304 then.
+    Raises `DownloadError` when the budget runs out or the server refuses the file(other 4xx)."""
+    cache = get_cache()
+    if conditional is True and cache is not None:
+        headers = dict(headers or {}, **cache.validators(link))
+    limiter = get_limiter()
+    budget = limiter.budget() if budget is None else budget
+    while True:
+        limiter.acquire(link)
+        wait = None
         try:
-            media_res = requests.get(link)
+            media_res = get_session().get(
+                link, headers=headers, stream=True, timeout=get_timeout()
+            )
+            # 416 answers a Range request and is handled by _requests_save()
+            if media_res.status_code == 416 and headers and 'Range' in headers:
+                return media_res
             media_res.raise_for_status()
-        except (requests.ConnectionError, requests.HTTPError, requests.ConnectTimeout) as err:
-            print('Download failed. Retrying ({}/3) in {} seconds : {}'.format(retry, retry*5, err), end='\r')
-            sleep(retry*5)
-            retry = retry + 1
+        except (requests.ConnectionError, requests.Timeout) as err:
+            error = err
+        except requests.HTTPError as err:
+            media_res.close()
+            error = err
+            if media_res.status_code not in RETRY_STATUSES:
+                raise DownloadError('Download of {} refused : {}'.format(link, err)) from err
+            wait = retry_after(media_res.headers)
+            if wait is not None and media_res.status_code in (429, 503):
+                limiter.throttled(link, wait)
         else:
             return media_res
-    print('Maximum retry exceeded, exiting program...')
-    sys.exit(1)
-
-def _media_download(twimg_list, save_location):
-    """Downloads photo/video from the twimg list compiled."""
-    length = len(twimg_list)
-    # obtains the name of the media(by searching backwards until it hits a '/')
-    for (idx, media) in enumerate(twimg_list):
-        percent = _percent_former((idx+1), length)
-        media_name = _get_media_name(media)
-
-        if os.path.exists(os.path.join(save_location, media_name)):
-            message = 'File ' + media_name + ' already exists.'
-            _status_print(message, percent, None)
-        elif not media.lower().endswith(FILE_EXTENSIONS):
-            message = 'Invalid media link ' + media + ' detected : skipping'
-            _status_print(message, percent, None)
+        if not budget.spend():
+            raise DownloadError('Maximum retry exceeded for {} : {}'.format(link, error)) from error
+        delay = limiter.backoff.delay(budget.used, wait)
+        print('Download failed. Retrying ({}/{}) in {:.1f} seconds : {}'.format(
+            budget.used, budget.retries, delay, error), end='\r')
+        logger.warning('Retrying %s in %.1fs : %s', link, delay, error)
+        sleep(delay)
+
+def _resume_download(link, file_save_path):
+    """Downloads `link` into `file_save_path`, resuming a previous `.part` file with a Range request.
+    Fresh downloads are conditional requests, a 304 is served from the HTTP cache.
+    A body cut short is resumed from the `.part` file, under the same retry budget as the requests.
+    Returns the `SaveResult` of `_requests_save()`. Raises `DownloadError` if the requests fail."""
+    cache = get_cache()
+    limiter = get_limiter()
+    budget = limiter.budget()
+    while True:
+        offset = _part_size(file_save_path)
+        headers = {'Range': 'bytes={}-'.format(offset)} if offset > 0 else None
+        if offset > 0:
+            logger.info('Resuming %s from byte %d', file_save_path, offset)
+        media_res = _media_request(link, headers, offset == 0, budget)
+        if media_res.status_code == 304:
+            media_res.close()
+            restored = cache.restore(link, file_save_path) if cache is not None else None
+            if restored is not None:
+                return SaveResult(file_save_path, *restored)
+            media_res = _media_request(link, headers, budget=budget)
+        try:
+            save_result = _requests_save(media_res, file_save_path)
+        except IncompleteDownloadError as err:
+            if not budget.spend():
+                raise DownloadError('Maximum retry exceeded for {} : {}'.format(link, err)) from err
+            delay = limiter.backoff.delay(budget.used)
+            print('Download incomplete. Retrying ({}/{}) in {:.1f} seconds : {}'.format(
+                budget.used, budget.retries, delay, err), end='\r')
+            logger.warning('Retrying %s in %.1fs : %s', link, delay, err)
+            sleep(delay)
+            continue
+        if cache is not None and save_result is not None:
+            cache.store(link, media_res.headers, file_save_path, save_result.size, save_result.sha256)
+        return save_result
+
+def _head_size(link):
+    """Content-Length of `link` from a HEAD request. `None` if the request fails or has none."""
+    get_limiter().acquire(link)
+    try:
+        head_res = get_session().head(link, allow_redirects=True, timeout=get_timeout())
+        head_res.raise_for_status()
+    except requests.RequestException as err:
+        logger.debug('HEAD %s failed : %s', link, err)
+        return None
+    length = head_res.headers.get('Content-Length')
+    if length is None or not length.isdigit() or head_res.headers.get('Content-Encoding'):
+        return None
+    return int(length)
+
+class _SuffixIndex():
+    """Hands out the next free `name(n).ext` of a folder. The folder is only listed once."""
+    _PATTERN = re.compile(r'^(.*)\((\d+)\)(\.[^.]*)$')
+
+    def __init__(self, folder):
+        self._folder = folder
+        self._highest = dict()
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                match = self._PATTERN.match(entry.name)
+                if match:
+                    key = match.group(1) + match.group(3)
+                    self._highest[key] = max(self._highest.get(key, 0), int(match.group(2)))
+
+    def next_path(self, name):
+        """Path of the next free suffix of `name`. Doesn't reserve it, see `taken()`."""
+        file_name, fext = os.path.splitext(name)
+        suffix = self._highest.get(name, 0) + 1
+        return os.path.join(self._folder, file_name + '({})'.format(suffix) + fext)
+
+    def taken(self, name):
+        """Marks the path given by `next_path(name)` as used."""
+        self._highest[name] = self._highest.get(name, 0) + 1
+
+def _duplicate_check(link, file_save_path, new_path, local_digest=None):
+    """Checks whether `link` holds the same data as `file_save_path` without loading either in memory.
+    Compares the HEAD Content-Length to the local size first, then streams the body while hashing it
+    (or takes it from the HTTP cache if the server answers 304).
+    Returns `True` if identical. Otherwise the remote data ends up at `new_path` and returns `False`.
+    `local_digest`(sha256) saves reading the local file, e.g. from the manifest."""
+    remote_size = _head_size(link)
+    if remote_size is not None and remote_size != os.path.getsize(file_save_path):
+        _resume_download(link, new_path)
+        return False
+    if local_digest is None:
+        local_digest = _file_digest(file_save_path)
+    save_result = _resume_download(link, new_path)
+    if save_result.sha256 == local_digest:
+        os.remove(new_path)
+        return True
+    return False
+
+def _media_precheck(record, save_location, known=None, manifest=None):
+    """Returns a `DownloadResult` if the `MediaRecord` doesn't need downloading(exists or invalid),
+    else `None`. `known` is the `Manifest.lookup()` of the list; a row whose file is gone is dropped
+    from it and from `manifest`."""
+    media_name = record.media_name
+    file_save_path = os.path.join(save_location, media_name)
+    if known is not None and _known_at(known, media_name, file_save_path, manifest):
+        return DownloadResult(record.url, media_name, 'exists', None)
+    elif os.path.exists(file_save_path):
+        return DownloadResult(record.url, media_name, 'exists', None)
+    elif record.extension not in FILE_EXTENSIONS:
+        return DownloadResult(record.url, media_name, 'invalid', None)
+    return None
+
+def _manifest_record(manifest, media, file_save_path, entry=None, save_result=None):
+    """Records a newly stored file in the manifest. `media` is a `MediaRecord` or a link.
+    `entry` is the `ManifestEntry` it was copied from, `save_result` the `SaveResult` it was saved with."""
+    if manifest is None:
+        return
+    record = _media_record(media)
+    if entry is not None:
+        manifest.add(
+            entry.media_name, file_save_path, record.url, entry.size, entry.sha256,
+            record.tweet_id if record.tweet_id is not None else entry.tweet_id
+        )
+    elif save_result is not None:
+        manifest.add(
+            record.media_name, file_save_path, record.url, save_result.size, save_result.sha256,
+            record.tweet_id
+        )
+    else:
+        manifest.add(
+            record.media_name, file_save_path, record.url,
+            os.path.getsize(file_save_path), _file_digest(file_save_path), record.tweet_id
+        )
+
+def _media_link(record):
+    """The link that is actually requested for the `MediaRecord`."""
+    if record.extension == '.jpg':
+        # only .jpg have different sizes (:large, :small)
+        return record.url + ':orig'
+    return record.url
+
+def _media_fetch(media, save_location, host_limiter=None, manifest=None, known=None):
+    """Downloads a single photo/video(a `MediaRecord` or a link). Returns a `DownloadResult`
+    instead of raising. A media the manifest knows from another location is copied from there instead."""
+    record = _media_record(media)
+    skipped = _media_precheck(record, save_location, known, manifest)
+    if skipped is not None:
+        return skipped
+    media = record.url
+    media_name = record.media_name
+    media_link = _media_link(record)
+    file_save_path = os.path.join(save_location, media_name)
+    if known:
+        entry = _copy_known(known, media_name, file_save_path)
+        if entry is not None:
+            _manifest_record(manifest, record, file_save_path, entry)
+            return DownloadResult(media, media_name, 'copied', None, entry.size, entry.sha256)
+    if get_bandwidth().exhausted:
+        return DownloadResult(media, media_name, 'stopped', None)
+    try:
+        if host_limiter is None:
+            save_result = _resume_download(media_link, file_save_path)
         else:
-            if media.lower().endswith('.jpg'):
-                _status_print('Downloading ' + media_name, percent, None)
-                # only .jpg have different sizes (:large, :small)
-                media_link = media + ':orig'
-            elif media.lower().endswith(('.png', '.mp4')):
-                _status_print('Downloading ' + media_name, percent, None)
-                media_link = media
-
-            media_res = _media_request(media_link)
-            _requests_save(media_res, os.path.join(save_location, media_name))
-
-def pic_downloader(twimg_list: list, save_location=None):
-    """Checks if the folder is empty before initiating download."""
+            with host_limiter(media_link):
+                save_result = _resume_download(media_link, file_save_path)
+        if save_result is None:
+            # the same link came up twice in the list and the other one saved it first
+            return DownloadResult(media, media_name, 'exists', None)
+        _manifest_record(manifest, record, file_save_path, save_result=save_result)
+    except BudgetExhausted:
+        return DownloadResult(media, media_name, 'stopped', None)
+    except (requests.RequestException, OSError) as err:
+        logger.error('Failed to download %s : %s', media_link, err)
+        return DownloadResult(media, media_name, 'failed', err)
+    return DownloadResult(
+        media, media_name, 'downloaded', None, save_result.size, save_result.sha256
+    )
+
+def _tweet_result(record, result):
+    """`result` with the tweet id of its `MediaRecord`, if it has one."""
+    if record.tweet_id is None:
+        return result
+    return result._replace(tweet_id=record.tweet_id)
+
+def _result_message(result):
+    """Turns a `DownloadResult` into a status message."""
+    if result.status == 'exists':
+        return 'File ' + result.media_name + ' already exists.'
+    elif result.status == 'invalid':
+        return 'Invalid media link ' + result.link + ' detected : skipping'
+    elif result.status == 'failed':
+        return 'Failed to download ' + result.media_name + ' : ' + str(result.error)
+    elif result.status == 'copied':
+        return 'Copied ' + result.media_name + ' from an earlier download.'
+    elif result.status == 'stopped':
+        return 'Byte budget reached : not downloading ' + result.media_name
+    return 'Downloaded ' + result.media_name
+
+def _media_stream(batches, save_location, workers=1, host_limit=None, manifest=None, length=None):
+    """Downloads photo/video of `batches`, an iterable of `list`s of `MediaRecord` or links(e.g. one
+    per timeline page), with a single pool for the whole stream : a batch starts downloading while
+    the one before it still is, and connections stay pooled across batches.
+    `workers` above 1 downloads concurrently, `host_limit` caps the connections per host.
+    `manifest` is checked once per batch and updated as files land.
+    Progress is always reported in order, out of `length` if given(else of the links received so far).
+    Returns a `list` of `DownloadResult`."""
+    host_limiter = _HostLimiter(host_limit) if host_limit else None
+    results = list()
+    received = 0
+    def _report(record, result):
+        result = _tweet_result(record, result)
+        results.append(result)
+        _status_print(_result_message(result), _percent_former(len(results), length or received), None)
+    pool = ThreadPoolExecutor(max_workers=workers) if workers is not None and workers > 1 else None
+    pending = deque()
+    try:
+        for batch in batches:
+            records = [_media_record(media) for media in batch]
+            received = received + len(records)
+            known = None
+            if manifest is not None:
+                known = manifest.lookup(record.media_name for record in records)
+            for record in records:
+                if pool is None:
+                    _report(record, _media_fetch(record, save_location, host_limiter, manifest, known))
+                    continue
+                pending.append((record, pool.submit(
+                    _media_fetch, record, save_location, host_limiter, manifest, known
+                )))
+                # a bounded window keeps every worker busy without queueing the whole stream,
+                # results are taken in submission order, which keeps the progress ordered
+                while len(pending) > workers * 2 or (pending and pending[0][1].done()):
+                    (done_record, future) = pending.popleft()
+                    _report(done_record, future.result())
+        while pending:
+            (done_record, future) = pending.popleft()
+            _report(done_record, future.result())
+    finally:
+        if pool is not None:
+            for (_, future) in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+        if manifest is not None:
+            manifest.flush()
+    return results
+
+def _media_download(twimg_list, save_location, workers=1, host_limit=None, manifest=None):
+    """Downloads photo/video from the twimg list compiled(`MediaRecord` or links),
+    see `_media_stream()`. Returns a `list` of `DownloadResult`."""
+    twimg_list = list(twimg_list)
+    return _media_stream((twimg_list,), save_location, workers, host_limit, manifest, len(twimg_list))
+
+def _failed_report(results):
+    """Prints every failed download of a session."""
+    failed = [result for result in results if result.status == 'failed']
+    if failed:
+        _v_print('', verbosity=0, level=None)
+        _v_print(
+            len(failed), 'of', len(results), 'downloads failed :',
+            verbosity=0, level=logger.warning
+        )
+        for result in failed:
+            _v_print(' ', result.link, ':', result.error, verbosity=0, level=logger.warning)
+    return failed
+
+def _budget_stop(links, save_location):
+    """Records the links a byte budget stopped short of, in `save_location/REMAINING_FILE`.
+    The file can be passed to textfile mode(-T) to carry on; partial files resume from `.part`.
+    Returns the path written, `None` if nothing was left."""
+    if not links:
+        return None
+    remaining_path = os.path.join(save_location, REMAINING_FILE)
+    bandwidth = get_bandwidth()
+    with open(remaining_path, 'w', encoding='utf-8') as remaining_file:
+        remaining_file.write(
+            '# byte budget of {} bytes reached, {} links left\n'.format(bandwidth.budget, len(links))
+        )
+        for link in links:
+            remaining_file.write(link + '\n')
+    _v_print('', verbosity=0, level=None)
+    _v_print(
+        'Byte budget reached after', bandwidth.total, 'bytes :', len(links),
+        'links left, listed in', remaining_path,
+        verbosity=0, level=logger.warning
+    )
+    return remaining_path
+
+def _stopped_report(results, save_location):
+    """Writes the links of every 'stopped' download, see `_budget_stop()`."""
+    return _budget_stop(
+        [result.link for result in results if result.status == 'stopped'], save_location
+    )
+
+def pic_downloader(twimg_list: list, save_location=None, workers=1, host_limit=None, manifest=None,
+                   report=True):
+    """Checks if the folder is empty before initiating download.
+    `report=False` leaves the failed/stopped reports to the caller(e.g. when called per batch).
+    Returns a `list` of `DownloadResult`, one for each link."""
+    _folder_check_empty(save_location)
+    results = _media_download(twimg_list, save_location, workers, host_limit, manifest)
+    if report is True:
+        _failed_report(results)
+        _stopped_report(results, save_location)
+    return results
+
+def stream_downloader(batches, save_location=None, workers=1, host_limit=None, manifest=None,
+                      report=True):
+    """`pic_downloader()` for a stream of link lists(see `_media_stream()`), e.g. the pages of a
+    timeline as they're parsed. One pool serves the whole stream.
+    Returns a `list` of `DownloadResult`, one for each link."""
     _folder_check_empty(save_location)
-    _media_download(twimg_list, save_location)
+    results = _media_stream(batches, save_location, workers, host_limit, manifest)
+    if report is True:
+        _failed_report(results)
+        _stopped_report(results, save_location)
+    return results
 
-def parser_downloader(file, save_location=None):
-    """File refers to the the file that contains the links."""
+def parser_downloader(file, save_location=None, workers=1, host_limit=None, manifest=None):
+    """File refers to the the file that contains the links.
+    Returns a `list` of `DownloadResult`, one for each link."""
     with open(file, 'r', encoding='utf-8') as link_file:
         links_list = _file_parser(link_file)
     for (idx, link) in enumerate(links_list):
         links_list[idx] = link.strip()
     _folder_check_empty(save_location)
-    _media_download(links_list, save_location)
+    results = _media_download(links_list, save_location, workers, host_limit, manifest)
+    _failed_report(results)
+    _stopped_report(results, save_location)
     # TODO : I think "Completed" overwrites and looks funny, fix it by clearing 1 line
     _v_print('\nCompleted')
+    return results
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk HTTP cache of ETag/Last-Modified validators and the bodies they validate.
+Repeat fetches of a cached link are sent as conditional requests(If-None-Match/If-Modified-Since),
+a 304 answer is served from the cache instead of transferring the media again.
+Bodies are hard linked from the downloaded file when possible, so they rarely cost extra disk.
+The least recently used bodies are evicted once the cache grows past its size limit.
+"""
+import os
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from .auxiliaryfuncs import _v_print
+from .confighandler import DEFAULT_CONFIG_PATH
+from .manifest import _file_digest
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(DEFAULT_CONFIG_PATH), 'httpcache')
+DEFAULT_MAX_SIZE = 2 * 1024**3
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER,
+    sha256 TEXT,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+'''
+
+_LOCK = threading.Lock()
+_CACHE = None
+# set once configure_cache() was called, even if it disabled the cache
+_CONFIGURED = False
+
+def _link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+class HTTPCache():
+    """Validators and bodies of earlier responses. Safe to share between download threads."""
+    def __init__(self, folder=None, max_size=DEFAULT_MAX_SIZE):
+        self.folder = DEFAULT_CACHE_PATH if folder is None or folder == '' else folder
+        self.max_size = max_size
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(self.folder, 'index.db'), check_same_thread=False
+        )
+        self._conn.executescript(_SCHEMA)
+        self.hits = 0
+
+    def _body_path(self, url):
+        return os.path.join(self.folder, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def validators(self, url):
+        """Conditional request headers for `url`. Empty if nothing(or no body) is cached."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified FROM entries WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None or not os.path.exists(self._body_path(url)):
+            return dict()
+        headers = dict()
+        if row[0]:
+            headers['If-None-Match'] = row[0]
+        if row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def restore(self, url, file_save_path):
+        """Puts the cached body of `url` at `file_save_path` after a 304.
+        Returns `(size, sha256)`, or `None` if the body is gone or no longer matches its entry(the
+        body shares its inode with the downloaded file, damage to one is damage to both)."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT size, sha256 FROM entries WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        body_path = self._body_path(url)
+        try:
+            intact = (
+                os.path.getsize(body_path) == row[0]
+                and (row[1] is None or _file_digest(body_path) == row[1])
+            )
+            if intact:
+                _link_or_copy(body_path, file_save_path)
+        except OSError:
+            logger.exception('Cached body of %s is unavailable', url)
+            intact = False
+        else:
+            if not intact:
+                logger.warning('Cached body of %s does not match its entry, dropping it', url)
+        if not intact:
+            self.discard(url)
+            return None
+        with self._lock:
+            self._conn.execute(
+                'UPDATE entries SET last_used = ? WHERE url = ?', (time.time(), url)
+            )
+            self._conn.commit()
+            self.hits = self.hits + 1
+        logger.info('Served %s from the HTTP cache', url)
+        return row[0], row[1]
+
+    def discard(self, url):
+        """Drops the validators and body of `url`, the next request for it is unconditional."""
+        with self._lock:
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
+            self._conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+            self._conn.commit()
+
+    def store(self, url, headers, file_save_path, size, sha256):
+        """Caches the validators of a response and the file its body was saved to.
+        Responses without ETag/Last-Modified are not cached."""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        body_path = self._body_path(url)
+        with self._lock:
+            try:
+                if os.path.exists(body_path):
+                    os.remove(body_path)
+                _link_or_copy(file_save_path, body_path)
+            except OSError:
+                logger.exception('Unable to cache %s', url)
+                return
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                (url, etag, last_modified, size, sha256, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drops the least recently used bodies until the cache fits in `max_size`."""
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_size:
+            return
+        for (url, size) in self._conn.execute(
+                'SELECT url, size FROM entries ORDER BY last_used').fetchall():
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
+            self._conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+            total = total - (size or 0)
+            logger.debug('Evicted %s from the HTTP cache', url)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def configure_cache(folder=None, max_size=DEFAULT_MAX_SIZE, enabled=True):
+    """Sets up the cache every download shares. `enabled=False` turns it off."""
+    global _CACHE, _CONFIGURED
+    with _LOCK:
+        if _CACHE is not None:
+            _CACHE.close()
+        _CACHE = HTTPCache(folder, max_size) if enabled is True else None
+        _CONFIGURED = True
+
+def cache_configured():
+    """`True` once `configure_cache()` was called(the cache may still be disabled)."""
+    return _CONFIGURED
+
+def get_cache():
+    """Returns the shared `HTTPCache`, `None` if it isn't configured."""
+    return _CACHE
+
+def cache_report(verbosity=1):
+    """Prints how many downloads were served from the HTTP cache."""
+    if _CACHE is not None and _CACHE.hits:
+        _v_print(
+            'HTTP cache : {} files served after a 304(Not Modified)'.format(_CACHE.hits),
+            verbosity=verbosity, level=logger.info
+        )
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Keeps a single pooled `requests.Session` that every download shares.
+Connections to pbs.twimg.com/video.twimg.com are kept alive between files and accounts,
+so a run only pays for the TCP/TLS handshakes once per pooled connection.
+"""
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .auxiliaryfuncs import _v_print
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+DEFAULT_POOL_SIZE = 10
+# (connect, read) timeout in seconds
+DEFAULT_TIMEOUT = (10, 60)
+
+_LOCK = threading.Lock()
+_SESSION = None
+_TIMEOUT = DEFAULT_TIMEOUT
+_POOL_SIZE = DEFAULT_POOL_SIZE
+# counters of sessions that were already closed, so reconfiguring doesn't lose them
+_CLOSED_STATS = {'requests': 0, 'connections': 0}
+
+def _create_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def _pool_stats(session):
+    """Sums up the request/connection counters of every urllib3 pool of the session."""
+    stats = {'requests': 0, 'connections': 0}
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats['requests'] += pool.num_requests
+            stats['connections'] += pool.num_connections
+    return stats
+
+def configure_session(pool_size=None, timeout=None):
+    """Sets the pool size(connections kept per host) and timeout of the shared session.
+    `timeout` is either seconds or a (connect, read) tuple. Closes the previous session if any."""
+    global _SESSION, _TIMEOUT, _POOL_SIZE
+    with _LOCK:
+        if _SESSION is not None:
+            _close(_SESSION)
+            _SESSION = None
+        if pool_size is not None:
+            _POOL_SIZE = pool_size
+        if timeout is not None:
+            _TIMEOUT = timeout
+    logger.info('HTTP session configured : pool_size=%s timeout=%s', _POOL_SIZE, _TIMEOUT)
+
+def get_session():
+    """Returns the shared `requests.Session`, creating it on first use."""
+    global _SESSION
+    with _LOCK:
+        if _SESSION is None:
+            _SESSION = _create_session(_POOL_SIZE)
+        return _SESSION
+
+def get_timeout():
+    """Timeout to pass along with every request of the shared session."""
+    return _TIMEOUT
+
+def _close(session):
+    stats = _pool_stats(session)
+    _CLOSED_STATS['requests'] += stats['requests']
+    _CLOSED_STATS['connections'] += stats['connections']
+    session.close()
+
+def close_session():
+    """Closes the shared session. The next `get_session()` creates a new one."""
+    global _SESSION
+    with _LOCK:
+        if _SESSION is not None:
+            _close(_SESSION)
+            _SESSION = None
+
+def connection_stats():
+    """Returns a `dict` with the amount of `requests`, new `connections` and `reused` connections."""
+    with _LOCK:
+        stats = dict(_CLOSED_STATS)
+        if _SESSION is not None:
+            current = _pool_stats(_SESSION)
+            stats['requests'] += current['requests']
+            stats['connections'] += current['connections']
+    stats['reused'] = max(stats['requests'] - stats['connections'], 0)
+    return stats
+
+def connection_report(verbosity=1):
+    """Prints how often connections were reused during the run."""
+    stats = connection_stats()
+    if stats['requests'] == 0:
+        return stats
+    _v_print(
+        'HTTP : {} requests over {} connections ({} reused, {:.1%})'.format(
+            stats['requests'], stats['connections'], stats['reused'],
+            stats['reused'] / stats['requests']
+        ),
+        verbosity=verbosity, level=logger.info
+    )
+    return stats
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Keeps a persistent index(SQLite) of every downloaded media file, keyed by the media name(id).
+Downloaders look up a whole link list in one batch before starting, so a media that already
+exists(even in another account's folder or another -o location) isn't fetched again.
+A row only counts while its file is still there with the recorded size.
+"""
+import os
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from .confighandler import DEFAULT_CONFIG_PATH
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.dirname(DEFAULT_CONFIG_PATH), 'manifest.db')
+# sqlite's default limit of variables is 999
+_LOOKUP_BATCH = 900
+# rows buffered before they are written in one transaction
+_FLUSH_SIZE = 100
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS media (
+    media_name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    url TEXT,
+    size INTEGER,
+    sha256 TEXT,
+    tweet_id TEXT,
+    added_at REAL,
+    PRIMARY KEY (media_name, path)
+);
+CREATE INDEX IF NOT EXISTS media_url ON media (url);
+'''
+
+def _hash_file(digest, file_path):
+    """Feeds the content of a file to a `hashlib` object. Returns the object."""
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest
+
+def _file_digest(file_path):
+    """sha256 hexdigest of a file."""
+    return _hash_file(hashlib.sha256(), file_path).hexdigest()
+
+class ManifestEntry():
+    """A single stored copy of a media."""
+    __slots__ = ('media_name', 'path', 'url', 'size', 'sha256', 'tweet_id')
+
+    def __init__(self, media_name, path, url=None, size=None, sha256=None, tweet_id=None):
+        self.media_name = media_name
+        self.path = path
+        self.url = url
+        self.size = size
+        self.sha256 = sha256
+        self.tweet_id = tweet_id
+
+class Manifest():
+    """Index of downloaded media. Safe to share between download threads."""
+    def __init__(self, path=None):
+        self.path = DEFAULT_MANIFEST_PATH if path is None or path == '' else path
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self._lock = threading.Lock()
+        self._pending = list()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        logger.info('Manifest opened at %s', self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def lookup(self, media_names):
+        """Returns a `dict` of media name to a `list` of `ManifestEntry`, for every known name.
+        Queries are batched, a list of 100k names only takes ~100 queries."""
+        media_names = list(set(media_names))
+        known = dict()
+        with self._lock:
+            self._flush()
+            for start in range(0, len(media_names), _LOOKUP_BATCH):
+                batch = media_names[start:start + _LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    'SELECT media_name, path, url, size, sha256, tweet_id FROM media '
+                    'WHERE media_name IN ({})'.format(','.join('?' * len(batch))),
+                    batch
+                )
+                for row in rows:
+                    known.setdefault(row[0], list()).append(ManifestEntry(*row))
+        return known
+
+    def entries(self, root=None):
+        """Returns a `list` of every `ManifestEntry`, only those stored under `root` if given."""
+        query = 'SELECT media_name, path, url, size, sha256, tweet_id FROM media'
+        params = ()
+        if root is not None:
+            root = os.path.join(os.path.abspath(root), '')
+            query = query + ' WHERE substr(path, 1, ?) = ?'
+            params = (len(root), root)
+        with self._lock:
+            self._flush()
+            return [ManifestEntry(*row) for row in self._conn.execute(query, params)]
+
+    def add(self, media_name, path, url=None, size=None, sha256=None, tweet_id=None):
+        """Records a stored media. Rows are written in batches, call `flush()` or `close()`."""
+        with self._lock:
+            self._pending.append((
+                media_name, os.path.abspath(path), url, size, sha256,
+                None if tweet_id is None else str(tweet_id), time.time()
+            ))
+            if len(self._pending) >= _FLUSH_SIZE:
+                self._flush()
+
+    def remove(self, media_name, path):
+        """Forgets the copy of `media_name` stored at `path`."""
+        with self._lock:
+            self._flush()
+            with self._conn:
+                self._conn.execute(
+                    'DELETE FROM media WHERE media_name = ? AND path = ?',
+                    (media_name, os.path.abspath(path))
+                )
+
+    def _flush(self):
+        if self._pending:
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?)', self._pending
+                )
+            self._pending = list()
+
+    def flush(self):
+        """Writes every buffered row."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._conn.close()
+
+def _known_at(known, media_name, file_save_path, manifest=None):
+    """Returns `True` if the manifest recorded `media_name` at `file_save_path` and the file there
+    still has the recorded size(a single `os.stat`). A row whose file is gone or changed is dropped
+    from `known`(and from `manifest` if given), so the media gets downloaded again."""
+    file_save_path = os.path.abspath(file_save_path)
+    entries = known.get(media_name, ())
+    for entry in entries:
+        if entry.path != file_save_path:
+            continue
+        try:
+            size = os.stat(file_save_path).st_size
+        except OSError:
+            size = None
+        if size is not None and (entry.size is None or size == entry.size):
+            return True
+        logger.info('Stale manifest row of %s at %s, the file is %s', media_name, file_save_path,
+                    'missing' if size is None else 'changed')
+        entries.remove(entry)
+        if manifest is not None:
+            manifest.remove(media_name, file_save_path)
+        return False
+    return False
+
+def _copy_known(known, media_name, file_save_path):
+    """Copies(hard links if possible) a stored copy of `media_name` to `file_save_path`.
+    Returns the `ManifestEntry` that was copied, or `None` if no intact copy exists."""
+    for entry in known.get(media_name, ()):
+        try:
+            if entry.size is not None and os.path.getsize(entry.path) != entry.size:
+                continue
+        except OSError:
+            continue
+        try:
+            os.link(entry.path, file_save_path)
+        except OSError:
+            try:
+                shutil.copyfile(entry.path, file_save_path)
+            except OSError:
+                logger.exception('Unable to copy %s to %s', entry.path, file_save_path)
+                continue
+        logger.info('Copied %s from %s', media_name, entry.path)
+        return entry
+    return None
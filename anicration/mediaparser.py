@@ -2,16 +2,79 @@
 """
 This modules parse for media links from Twitter's JSON
 responses which is obtained from Tweepy's \\_json data.
+The public functions return links(`str`); `iter_media_records()` yields `MediaRecord` instead,
+which keeps the tweet a link came from along.
 QuoteParser has extra features as well, it's *for api purposes*.
 """
+import os
 import json
 import logging
 
 from .auxiliaryfuncs import _v_print
+from .archive import iter_archive
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# status fields the media parser reads, `project_status()` keeps only these
+STATUS_FIELDS = ('id', 'created_at', 'truncated', 'is_quote_status', 'extended_entities')
+_MEDIA_FIELDS = ('id', 'type', 'media_url', 'media_url_https', 'video_info')
+
+class MediaRecord():
+    """A media link and what the parser knew about it. Only references are stored(the link, id and
+    date are those of the status), the file name and extension are sliced from the link when asked.
+    `str()` gives the link, and a record compares and hashes like its link."""
+    __slots__ = ('url', 'media_type', 'tweet_id', 'created_at', 'bitrate')
+
+    def __init__(self, url, media_type=None, tweet_id=None, created_at=None, bitrate=None):
+        self.url = url
+        self.media_type = media_type
+        self.tweet_id = tweet_id
+        self.created_at = created_at
+        # of the chosen video variant
+        self.bitrate = bitrate
+
+    @property
+    def media_name(self):
+        """Everything after the last slash of the link."""
+        return self.url[self.url.rfind('/') + 1:]
+
+    @property
+    def extension(self):
+        """Lowercase extension of the file name('.jpg'), empty if it has none."""
+        url = self.url
+        dot = url.rfind('.')
+        if dot == -1 or dot < url.rfind('/'):
+            return ''
+        return url[dot:].lower()
+
+    @classmethod
+    def from_status(cls, url, media_type, status=None, bitrate=None):
+        """A record of a link found in `status`(a status `dict`, may be `None`)."""
+        if status is None:
+            return cls(url, media_type, bitrate=bitrate)
+        return cls(url, media_type, status.get('id'), status.get('created_at'), bitrate)
+
+    def __str__(self):
+        return self.url
+
+    def __repr__(self):
+        return 'MediaRecord({!r}, tweet_id={!r})'.format(self.url, self.tweet_id)
+
+    def __eq__(self, other):
+        if isinstance(other, MediaRecord):
+            return self.url == other.url
+        return self.url == other
+
+    def __hash__(self):
+        return hash(self.url)
+
+def _media_record(media):
+    """`media` as a `MediaRecord`, plain links(`str`) are wrapped."""
+    if isinstance(media, MediaRecord):
+        return media
+    return MediaRecord(media)
+
 class QuoteParser():
     """Simplifies the need for quoted data."""
     def __init__(self, status, https=True, silent_ignore=True):
@@ -52,50 +115,55 @@ class QuoteParser():
     def media_links(self, https=True):
         """Returns `list` of links. Returns `None` if not truncated"""
         if self._truncated is False:
-            return _ext_ett_handler(self.extended_entities, https)
+            return _links(_ext_ett_handler(self.extended_entities, https, self.quoted_status))
         elif self._truncated is True:
             return None
 
-def _compare_bitrate_data(variants: list):
-    """Takes in `variants` of the `Tweet`. Returns a `list` of the link with highest bitrate."""
-    bitrate = dict()
+def _best_variant(variants: list):
+    """Takes in `variants` of the `Tweet`. Returns the variant with highest bitrate."""
+    best = None
     for (idx, variants_obj) in enumerate(variants):
-        try:
-            bitrate[str(idx)] = variants_obj['bitrate']
-        except KeyError:
+        if 'bitrate' not in variants_obj:
             _v_print(
                 'video_handler() -- KeyError at %s', str(idx),
                 verbosity=2, level=logger.debug
             )
             continue
-    return [variants[int(max(bitrate, key=lambda key: bitrate[key]))]['url']]
+        if best is None or variants_obj['bitrate'] > best['bitrate']:
+            best = variants_obj
+    return best
 
-def _photo_handler(medias: dict, https: bool):
-    """Return a `list` of the parsed https photo links."""
-    links = list()
+def _photo_handler(medias: dict, https: bool, status=None):
+    """Return a `list` of `MediaRecord` of the parsed https photo links."""
+    records = list()
     for media in medias:
-        if https:
-            links.append(media['media_url_https'])
-        else:
-            links.append(media['media_url'])
-    return links
+        link = media['media_url_https'] if https else media['media_url']
+        records.append(MediaRecord.from_status(link, 'photo', status))
+    return records
 
-def _video_handler(medias: list):
-    """Accepts a list of media parsed dict. Returns `list` of link(s)."""
-    variants = medias[0]['video_info']['variants']
-    return _compare_bitrate_data(variants)
+def _video_handler(medias: list, status=None):
+    """Accepts a list of media parsed dict. Returns `list` of `MediaRecord`."""
+    variant = _best_variant(medias[0]['video_info']['variants'])
+    return [MediaRecord.from_status(variant['url'], 'video', status, variant['bitrate'])]
 
-def _ext_ett_handler(ext_ett: dict, https: bool):
-    """Stands for `extended_entity_handler()`. Accepts only `extended_entities` objects."""
+def _ext_ett_handler(ext_ett: dict, https: bool, status=None):
+    """Stands for `extended_entity_handler()`. Accepts only `extended_entities` objects.
+    `status` is the status they belong to, its id and date go into the records."""
     try:
         media_type = ext_ett['media'][0]['type']
         if media_type == 'photo':
-            return _photo_handler(ext_ett['media'], https)
+            return _photo_handler(ext_ett['media'], https, status)
         elif media_type == 'video':
-            return _video_handler(ext_ett['media'])
+            return _video_handler(ext_ett['media'], status)
     except TypeError:
         print('TypeError excepted: ' + ext_ett)
 
+def _links(records):
+    """The links of a `list` of `MediaRecord`, `None` stays `None`."""
+    if records is None:
+        return None
+    return [record.url for record in records]
+
 def get_quoted_data(status, https=True, silent_ignore=True):
     """Returns `QuoteParser` object.\n
     Return `None` if empty or no quoted status(if silent_ignore is True)"""
@@ -126,64 +194,106 @@ def get_video_thumbnail(status, https=True):
         return None
 
 def get_media_link(status, https=True):
-    """Return a `list` of media link from a single status(photo or video).\n
+    """Return a `list` of links from a single status(photo or video).\n
     Receives a parsed `status` JSON data. Does handle `str` status, but no guarantee.\n
     If `https` is `True`, then obtains the https version of the photo.\n"""
     try:
-        media_links = _ext_ett_handler(status['extended_entities'], https)
+        media_links = _ext_ett_handler(status['extended_entities'], https, status)
     except (ValueError, KeyError):
         _v_print('Error : get_media_link() ValueError or KeyError detected -- ')
     except TypeError:
         _v_print('WARNING : Did you pass in a non-json parsed string?', verbosity=0, level=None)
         logger.exception('get_media_link() TypeError.')
         try:
-            media_links = _ext_ett_handler(json.loads(status)['extended_entities'], https)
+            status = json.loads(status)
+            media_links = _ext_ett_handler(status['extended_entities'], https, status)
         except json.JSONDecodeError:
             _v_print('Invalid JSON.', verbosity=0, level=logger.exception)
             raise
-        return media_links
+        return _links(media_links)
     else:
-        return media_links
+        return _links(media_links)
     return None
 
-def media_parser(json_data, log_path: str, log_create=True, no_rt=True):
-    """json_data needs to be a string(file.read()). The script will do the loading.
-    Only reads a compiled Twitter API responses status arranged in a list : [{},{},{}]"""
+def _status_media_links(tweet, no_rt=True):
+    """Returns a `list` of `MediaRecord` of a single status(empty if it has none).
+    Quote statuses are skipped, and so are retweets if `no_rt` is `True`."""
+    if tweet['is_quote_status'] is True:
+        return list()
+    if no_rt is True and 'retweeted_status' in tweet:
+        return list()
     try:
-        tweets = json.loads(json_data)
+        return _ext_ett_handler(tweet['extended_entities'], True, tweet) or list()
+    except KeyError:
+        logger.debug("No media at status %s", tweet.get('id'))
     except TypeError:
-        _v_print('test - json not a str, passing as-is', 2)
-        tweets = json_data
+        pass
+    return list()
 
+def project_status(status, fields=()):
+    """Strips a status `dict` down to what the parser, checkpoints and archives read(`STATUS_FIELDS`),
+    plus the top-level `fields` given. Its media keep only their links and video variants, and a
+    retweet keeps only its id(`no_rt` only asks whether there is one). Returns a new `dict`."""
+    projected = dict()
+    for field in STATUS_FIELDS + tuple(fields):
+        if field in status:
+            projected[field] = status[field]
+    if 'retweeted_status' in status and 'retweeted_status' not in fields:
+        projected['retweeted_status'] = {'id': status['retweeted_status'].get('id')}
+    if 'extended_entities' in projected:
+        medias = list()
+        for media in projected['extended_entities'].get('media', ()):
+            kept = {key: media[key] for key in _MEDIA_FIELDS if key in media}
+            if 'video_info' in kept:
+                kept['video_info'] = {'variants': kept['video_info'].get('variants', [])}
+            medias.append(kept)
+        projected['extended_entities'] = {'media': medias}
+    return projected
+
+def iter_media_records(statuses, log_path=None, no_rt=True):
+    """Yields a `MediaRecord` per media link of `statuses` one status at a time, so the first are ready before
+    the rest is read. `statuses` can be any iterable of statuses(`dict` or tweepy models) : a list,
+    a stream of pages(a page being a `list` of statuses) or the path of an archive(see `iter_archive()`).
+    With a `log_path`, every link is also written into that file as it's yielded."""
+    if isinstance(statuses, str):
+        statuses = iter_archive(statuses)
+    log_file = open(log_path, 'w', encoding='utf-8') if log_path is not None else None
     try:
-        tweets[0]
-    except KeyError:
-        _v_print('Invalid Tweet JSON data, exiting program...', verbosity=0, level=logger.exception)
-        raise
+        for item in statuses:
+            for tweet in (item if isinstance(item, list) else (item,)):
+                for record in _status_media_links(getattr(tweet, '_json', tweet), no_rt):
+                    if log_file is not None:
+                        logger.debug('Logged %s into %s', record.url, log_path)
+                        log_file.write(record.url + '\n')
+                    yield record
+    finally:
+        if log_file is not None:
+            log_file.close()
 
-    media_links = list()
-    for (idx, tweet) in enumerate(tweets):
-        if tweet['is_quote_status'] is True:
-            continue
-        try:
-            tweet['retweeted_status']
-        except KeyError:
-            pass
-        else:
-            if no_rt is True:
-                continue
+def iter_media_links(statuses, log_path=None, no_rt=True):
+    """Like `iter_media_records()`, but yields the links(`str`)."""
+    for record in iter_media_records(statuses, log_path, no_rt):
+        yield record.url
+
+def media_parser(json_data, log_path: str, log_create=True, no_rt=True):
+    """json_data needs to be a string(file.read()), a list of statuses or the path of an archive
+    (JSON or JSONL, plain/gzip/xz). The script will do the loading.
+    Only reads a compiled Twitter API responses status arranged in a list : [{},{},{}]
+    Returns a `list` of links, `iter_media_links()` yields them as it goes instead."""
+    if isinstance(json_data, str) and os.path.isfile(json_data):
+        # statuses are read one at a time, the archive is never loaded whole
+        tweets = json_data
+    else:
         try:
-            media_links.extend(_ext_ett_handler(tweet['extended_entities'], True))
-        except KeyError:
-            logger.debug("No media at status number %d", idx)
+            tweets = json.loads(json_data)
         except TypeError:
-            #print('TEST -- TypeError excepted at media_parser() at {}'.format(idx))
-            pass
+            _v_print('test - json not a str, passing as-is', 2)
+            tweets = json_data
 
-    if log_create is True:
-        with open(log_path, 'w', encoding="utf-8") as file:
-            for link in media_links:
-                logger.debug('Logged %s into %s', link, log_path)
-                file.write(link + '\n')
+        try:
+            tweets[0]
+        except KeyError:
+            _v_print('Invalid Tweet JSON data, exiting program...', verbosity=0, level=logger.exception)
+            raise
 
-    return media_links
+    return list(iter_media_links(tweets, log_path if log_create is True else None, no_rt))
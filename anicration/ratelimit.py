@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Rate limiting and retry scheduling shared by every download path.
+Each host gets a token bucket(requests per second with a burst allowance), failed requests are
+retried with exponential backoff and full jitter, and 429/503 answers with Retry-After pause the
+whole host instead of only the request that got them.
+`Bandwidth` accounts every downloaded byte : a global bytes/s cap, a per-run byte budget and
+the throughput shown in the progress output.
+`WindowBudget` spreads Twitter API calls(e.g. user_timeline) of every account over one shared
+rate-limit window.
+"""
+import random
+import logging
+import threading
+
+from collections import deque
+
+from time import monotonic, sleep
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+DEFAULT_RETRIES = 4
+# HTTP statuses worth retrying, anything else 4xx is a permanent failure
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+# seconds of history the throughput is averaged over
+RATE_WINDOW = 5.0
+# user_timeline allows 900 calls per 15 minutes(user auth)
+TIMELINE_CALLS = 900
+TIMELINE_WINDOW = 15 * 60.0
+
+_LOCK = threading.Lock()
+_LIMITER = None
+_BANDWIDTH = None
+# set once configure_bandwidth() was called, so a later config doesn't undo command-line values
+_BANDWIDTH_CONFIGURED = False
+_TIMELINE_BUDGET = None
+
+class BudgetExhausted(Exception):
+    """The byte budget of the run is used up. Not an `IOError` : it isn't a failed download."""
+
+class TokenBucket():
+    """`rate` tokens per second, up to `capacity` of them banked. A `rate` of `None` never waits
+    (other than for `pause()`). Thread safe; `reserve()` also suits asyncio."""
+    def __init__(self, rate=None, capacity=None):
+        self.rate = rate if rate else None
+        self.capacity = capacity if capacity else max(self.rate or 1, 1)
+        self._tokens = self.capacity
+        self._stamp = monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Takes `tokens` and returns how many seconds to wait before using them."""
+        with self._lock:
+            now = monotonic()
+            wait = max(self._paused_until - now, 0.0)
+            if self.rate is None:
+                return wait
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens = self._tokens - tokens
+            if self._tokens < 0:
+                # in debt : the tokens are handed out once the bucket refills
+                wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` are available."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            sleep(wait)
+
+    def pause(self, seconds):
+        """Nothing is handed out for `seconds`(e.g. after a 429 with Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, monotonic() + seconds)
+
+class Backoff():
+    """Exponential backoff with full jitter, `retries` attempts after the first one."""
+    def __init__(self, retries=DEFAULT_RETRIES, base=1.0, cap=60.0):
+        self.retries = retries
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt`(starting at 1).
+        A server's Retry-After is honored as the minimum."""
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+class RetryBudget():
+    """Retries left for a single file, shared by every request made for it."""
+    def __init__(self, retries=DEFAULT_RETRIES):
+        self.retries = retries
+        self.used = 0
+
+    def spend(self):
+        """Uses up one retry. Returns `False` if none are left."""
+        if self.used >= self.retries:
+            return False
+        self.used = self.used + 1
+        return True
+
+class RateLimiter():
+    """One `TokenBucket` per host plus the `Backoff` policy, shared by all downloads."""
+    def __init__(self, rate=None, burst=None, retries=DEFAULT_RETRIES):
+        self.rate = rate
+        self.burst = burst
+        self.backoff = Backoff(retries)
+        self._buckets = dict()
+        self._lock = threading.Lock()
+
+    def bucket(self, link):
+        host = urlsplit(link).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def acquire(self, link):
+        """Blocks until the host of `link` may be requested."""
+        self.bucket(link).acquire()
+
+    def reserve(self, link):
+        """Non-blocking `acquire()`, returns the seconds to wait(for asyncio)."""
+        return self.bucket(link).reserve()
+
+    def budget(self):
+        """A fresh `RetryBudget` for one file."""
+        return RetryBudget(self.backoff.retries)
+
+    def throttled(self, link, retry_after):
+        """Pauses the host of `link` after a 429/503 with Retry-After."""
+        logger.warning('%s throttled, pausing the host for %.1fs', urlsplit(link).netloc, retry_after)
+        self.bucket(link).pause(retry_after)
+
+class WindowBudget():
+    """At most `calls` within any `window` seconds(a sliding log of the calls made).
+    Meant for the API's rate-limit windows, shared by every thread fetching from it."""
+    def __init__(self, calls=TIMELINE_CALLS, window=TIMELINE_WINDOW):
+        self.calls = calls
+        self.window = window
+        self._made = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a call fits in the window, then counts it."""
+        while True:
+            with self._lock:
+                now = monotonic()
+                while self._made and self._made[0] <= now - self.window:
+                    self._made.popleft()
+                if len(self._made) < self.calls:
+                    self._made.append(now)
+                    return
+                wait = self._made[0] + self.window - now
+            logger.info('Rate-limit window is used up, waiting %.1fs', wait)
+            sleep(wait)
+
+class Bandwidth():
+    """Global byte accounting shared by every download.
+    `rate` caps bytes per second(`None` for no cap), `budget` stops the run after that many bytes."""
+    def __init__(self, rate=None, budget=None):
+        # one second worth of bytes may be banked, so the cap holds over any second
+        self._bucket = TokenBucket(rate, rate) if rate else None
+        self.budget = budget if budget else None
+        self.total = 0
+        self._history = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self):
+        return self.budget is not None and self.total >= self.budget
+
+    def reserve(self, nbytes):
+        """Accounts `nbytes` and returns the seconds to wait before taking more(for asyncio).
+        Raises `BudgetExhausted` once the budget is used up."""
+        now = monotonic()
+        with self._lock:
+            self.total = self.total + nbytes
+            self._history.append((now, nbytes))
+            while self._history and self._history[0][0] < now - RATE_WINDOW:
+                self._history.popleft()
+        if self.exhausted:
+            raise BudgetExhausted('Byte budget of {} bytes reached.'.format(self.budget))
+        return self._bucket.reserve(nbytes) if self._bucket is not None else 0.0
+
+    def consume(self, nbytes):
+        """Blocking `reserve()`."""
+        wait = self.reserve(nbytes)
+        if wait > 0:
+            sleep(wait)
+
+    def rate(self):
+        """Bytes per second over the last `RATE_WINDOW` seconds."""
+        now = monotonic()
+        with self._lock:
+            while self._history and self._history[0][0] < now - RATE_WINDOW:
+                self._history.popleft()
+            if not self._history:
+                return 0.0
+            transferred = sum(nbytes for (_, nbytes) in self._history)
+            elapsed = max(now - self._history[0][0], 1.0)
+        return transferred / elapsed
+
+def format_rate(rate):
+    """Formats bytes per second : 512.0 KB/s, 1.2 MB/s"""
+    if rate >= 1024**2:
+        return '{:.1f} MB/s'.format(rate / 1024**2)
+    return '{:.1f} KB/s'.format(rate / 1024)
+
+def retry_after(headers):
+    """Seconds from a Retry-After header(either seconds or an HTTP date). `None` if absent."""
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+def configure_limiter(rate=None, burst=None, retries=DEFAULT_RETRIES):
+    """Sets the requests per second(per host, `None` for no limit), burst and retry budget per file."""
+    global _LIMITER
+    with _LOCK:
+        _LIMITER = RateLimiter(rate, burst, retries)
+
+def get_limiter():
+    """Returns the shared `RateLimiter`, creating an unlimited one on first use."""
+    global _LIMITER
+    with _LOCK:
+        if _LIMITER is None:
+            _LIMITER = RateLimiter()
+        return _LIMITER
+
+def configure_bandwidth(rate=None, budget=None):
+    """Sets the global bytes per second cap and the byte budget of the run(`None` for neither)."""
+    global _BANDWIDTH, _BANDWIDTH_CONFIGURED
+    with _LOCK:
+        _BANDWIDTH = Bandwidth(rate, budget)
+        _BANDWIDTH_CONFIGURED = True
+
+def bandwidth_configured():
+    """`True` once `configure_bandwidth()` was called."""
+    return _BANDWIDTH_CONFIGURED
+
+def get_bandwidth():
+    """Returns the shared `Bandwidth`, creating an unlimited one on first use."""
+    global _BANDWIDTH
+    with _LOCK:
+        if _BANDWIDTH is None:
+            _BANDWIDTH = Bandwidth()
+        return _BANDWIDTH
+
+def configure_timeline_budget(calls=TIMELINE_CALLS, window=TIMELINE_WINDOW):
+    """Sets the user_timeline calls allowed per window, shared by every account."""
+    global _TIMELINE_BUDGET
+    with _LOCK:
+        _TIMELINE_BUDGET = WindowBudget(calls, window)
+
+def get_timeline_budget():
+    """Returns the shared user_timeline `WindowBudget`, creating the default one on first use."""
+    global _TIMELINE_BUDGET
+    with _LOCK:
+        if _TIMELINE_BUDGET is None:
+            _TIMELINE_BUDGET = WindowBudget()
+        return _TIMELINE_BUDGET
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Re-derives the link logs of every archive under a json_loc tree, e.g. after the link selection
+rules changed. Archives are parsed in a process pool(parsing is CPU bound, threads would share
+one core). Every archive gets its log back, and the combined reindex-links.txt lists every link
+of the tree once, ready for textfile mode.
+A state file remembers the mtime, size and hash of every archive, so a later run only parses the
+archives that are new or changed.
+"""
+import os
+import json
+import logging
+
+from time import monotonic
+from concurrent.futures import ProcessPoolExecutor
+
+from .auxiliaryfuncs import _v_print
+from .downloader import _percent_former, _status_print
+from .manifest import _file_digest
+from .mediaparser import iter_media_links
+from .archive import ARCHIVE_FORMATS
+from .checkpoint import DEFAULT_CHECKPOINT_PATH
+from .timeseries import _SNAPSHOT_NAME
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+STATE_FILE = 'reindex-state.json'
+LINKS_FILE = 'reindex-links.txt'
+# files of anicration itself that can sit next to the archives(user_data-* snapshots as well)
+_NOT_ARCHIVES = (STATE_FILE, LINKS_FILE, os.path.basename(DEFAULT_CHECKPOINT_PATH))
+# folders of saved backfill pages, their statuses are in the account's archive as well
+_SKIPPED_SUFFIX = '-backfill'
+# archives handed to a worker process at a time
+_CHUNKSIZE = 4
+# seconds between saves of the state while archives are parsed
+_STATE_INTERVAL = 10.0
+
+def _archive_base(name):
+    """`name` without its archive extension, `None` if it isn't an archive."""
+    for archive_format in sorted(ARCHIVE_FORMATS, key=len, reverse=True):
+        if name.endswith('.' + archive_format):
+            return name[:-len(archive_format) - 1]
+    return None
+
+def _find_archives(root, skipped=()):
+    """Returns the sorted `list` of archive paths under `root`, relative to it.
+    The folders in `skipped`(e.g. a log folder inside `root`) aren't walked."""
+    skipped = {os.path.abspath(folder) for folder in skipped}
+    archives = list()
+    for (folder, subfolders, names) in os.walk(root):
+        subfolders[:] = sorted(
+            name for name in subfolders
+            if not name.endswith(_SKIPPED_SUFFIX) and os.path.abspath(os.path.join(folder, name)) not in skipped
+        )
+        for name in names:
+            if _archive_base(name) is not None and name not in _NOT_ARCHIVES and not _SNAPSHOT_NAME.search(name):
+                archives.append(os.path.relpath(os.path.join(folder, name), root))
+    return sorted(archives)
+
+def _log_name(relative_path):
+    """Link log of an archive, at the same place under the log folder."""
+    return os.path.join(os.path.dirname(relative_path), _archive_base(os.path.basename(relative_path)) + '.txt')
+
+def _extract(job):
+    """Worker : hashes an archive and, if the hash differs from the known one, parses it.
+    Returns (relative path, state `dict`(mtime, size, sha256), `list` of links or `None` when
+    unchanged, error message or `None`). An archive that can't be read(truncated, still being
+    written) returns its error instead of raising, the other archives carry on."""
+    (path, relative_path, known_sha256, no_rt) = job
+    try:
+        # stat before hashing : an archive written to meanwhile looks changed on the next run
+        stat = os.stat(path)
+        sha256 = _file_digest(path)
+        file_state = {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': sha256}
+        if sha256 == known_sha256:
+            return (relative_path, file_state, None, None)
+        links = list(iter_media_links(path, no_rt=no_rt))
+    except Exception as err:
+        return (relative_path, None, None, '{}: {}'.format(type(err).__name__, err))
+    return (relative_path, file_state, links, None)
+
+def _load_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return dict()
+    except ValueError:
+        logger.warning('Unreadable reindex state at %s, parsing everything again', path)
+        return dict()
+
+def _save_state(path, state):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(state, file, indent=4, sort_keys=True)
+    os.replace(temp_path, path)
+
+def reindex(json_loc, log_loc, workers=None, no_rt=True, full=False):
+    """Writes a link log into `log_loc` for every archive under `json_loc`(mirroring its folders)
+    and `LINKS_FILE`, every link of them once(in archive order).
+    Archives unchanged since the last run are skipped, unless `full` is `True` or `no_rt` differs.
+    Parses with `workers` processes(defaults to the number of cores). Archives that can't be read are
+    logged and skipped; the state is saved as results come in, so an interrupted run keeps its work.
+    Returns a `dict` with the number of 'archives', 'parsed' and 'failed' archives and unique 'links'."""
+    if not os.path.exists(log_loc):
+        os.makedirs(log_loc)
+    state_path = os.path.join(log_loc, STATE_FILE)
+    state = _load_state(state_path)
+    files = state.get('files', dict())
+    if full or state.get('no_rt', no_rt) != no_rt:
+        files = dict()
+    archives = _find_archives(json_loc, skipped=(log_loc,))
+    jobs = list()
+    for relative_path in archives:
+        path = os.path.join(json_loc, relative_path)
+        stat = os.stat(path)
+        known = files.get(relative_path)
+        if known is not None and not os.path.exists(os.path.join(log_loc, _log_name(relative_path))):
+            known = None
+        if known is not None and known['mtime'] == stat.st_mtime and known['size'] == stat.st_size:
+            continue
+        jobs.append((path, relative_path, known['sha256'] if known is not None else None, no_rt))
+    # dropped archives are forgotten
+    files = {relative_path: files[relative_path] for relative_path in archives if relative_path in files}
+
+    length = len(jobs)
+    parsed = 0
+    failed = list()
+    if length:
+        saved_at = monotonic()
+        try:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                results = pool.map(_extract, jobs, chunksize=_CHUNKSIZE)
+                for (idx, (relative_path, file_state, links, error)) in enumerate(results):
+                    if error is not None:
+                        # the archive keeps its old state(if any), so the next run tries it again
+                        failed.append(relative_path)
+                        logger.warning('Skipping unreadable archive %s : %s', relative_path, error)
+                        message = 'Unreadable : ' + relative_path
+                    elif links is None:
+                        message = 'Unchanged : ' + relative_path
+                    else:
+                        parsed = parsed + 1
+                        log_path = os.path.join(log_loc, _log_name(relative_path))
+                        if not os.path.exists(os.path.dirname(log_path)):
+                            os.makedirs(os.path.dirname(log_path))
+                        with open(log_path, 'w', encoding='utf-8') as file:
+                            for link in links:
+                                file.write(link + '\n')
+                        message = '{} links : {}'.format(len(links), relative_path)
+                    if file_state is not None:
+                        files[relative_path] = file_state
+                    _status_print(message, _percent_former((idx+1), length), None)
+                    if monotonic() - saved_at >= _STATE_INTERVAL:
+                        _save_state(state_path, {'no_rt': no_rt, 'files': files})
+                        saved_at = monotonic()
+        finally:
+            # whatever was parsed before an interruption isn't parsed again
+            _save_state(state_path, {'no_rt': no_rt, 'files': files})
+        _v_print('', verbosity=0, level=None)
+
+    # every link once, whichever archives it's in(the logs keep them all, so a changed archive
+    # never takes links away from another)
+    seen = set()
+    with open(os.path.join(log_loc, LINKS_FILE), 'w', encoding='utf-8') as combined:
+        for relative_path in archives:
+            log_path = os.path.join(log_loc, _log_name(relative_path))
+            if not os.path.exists(log_path):
+                # unreadable, and never parsed before
+                continue
+            with open(log_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    link = line.rstrip('\n')
+                    if link and link not in seen:
+                        seen.add(link)
+                        combined.write(link + '\n')
+    _save_state(state_path, {'no_rt': no_rt, 'files': files})
+    for relative_path in failed:
+        _v_print(' Unreadable :', relative_path, verbosity=0, level=None)
+    _v_print(
+        'Re-indexed', len(archives), 'archives :', parsed, 'parsed,', len(archives) - parsed - len(failed),
+        'unchanged,', len(failed), 'unreadable,', len(seen), 'unique links.', verbosity=0, level=logger.info
+    )
+    return {'archives': len(archives), 'parsed': parsed, 'failed': len(failed), 'links': len(seen)}
@@ -5,27 +5,45 @@ Uses a config file(defaults to %appdata%/anicration/config.txt) which most funct
 config_create() creates a config file(you may provide a location) at affromentioned location.\n
 twitter_media_downloader() does the bulk of downloading photo/video of accounts with the added
 benefit of allowing one to customize their inputs if they know Python.\n
-track_twitter_info() downloads all 9 seiyuu current-user-data for tracking numbers and maths.\n
+track_twitter_info() downloads the current user data of the tracked accounts every hour, for numbers and maths.\n
 Refer to the wiki for more information.
 """
 import os
 import sys
 import json
 import logging
+import threading
 from time import sleep
-from datetime import datetime
+from queue import Queue, Empty, Full
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
 import tweepy
 
 from .auxiliaryfuncs import _v_print, _set_verbosity
-from .mediaparser import media_parser
+from .mediaparser import iter_media_records, project_status
 from .confighandler import ConfigHandler
-from .downloader import pic_downloader
+from . import downloader
+from . import asyncdownloader
 from .downloader import _folder_check_empty
+from .httpsession import configure_session, connection_report
+from .httpcache import configure_cache, cache_configured, cache_report
+from .ratelimit import configure_limiter, configure_bandwidth, bandwidth_configured
+from .ratelimit import configure_timeline_budget, get_timeline_budget
+from .manifest import Manifest
+from .checkpoint import CheckpointStore, _account_key
+from .archive import ArchiveWriter, archive_path
+from .timelinesource import RecordingSource, ReplaySource
+from .timeseries import TimeSeriesStore
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 BASE_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config', 'example.txt')
+# timeline pages(or their media links) buffered between the stages of _media_pipeline()
+PIPELINE_DEPTH = 4
+_PIPELINE_DONE = object()
+# accounts per users/lookup call(Twitter's maximum)
+LOOKUP_BATCH = 100
 
 def config_create(file_location=None, file_name='config.txt'):
     """Creates a config at file location. Defaults to %appdata%/anicration/config.txt
@@ -95,24 +113,235 @@ def _tweepy_init(auth_keys):
         msg='Tweepy initiation'
     )
 
-def _get_json(api, twitter_id: str, items: int):
-    def _get_cursor():
-        return tweepy.Cursor(api.user_timeline, id=twitter_id, tweet_mode='extended')
-    def _get_status():
-        json_data = list()
-        json_num = int()
-        for (idx, status) in enumerate(_get_cursor().items(items)):
-            json_data.append(status._json)
+def _open_source(auth_keys, replay=None, record=None, latency=0.0):
+    """Returns the timeline source : the authenticated api, or a `ReplaySource` of the `replay`
+    folder(no credentials needed). Wrapped in a `RecordingSource` if a `record` folder is given."""
+    if replay:
+        _v_print('Replaying recorded responses from', replay, verbosity=1, level=logger.info)
+        source = ReplaySource(replay, latency)
+    else:
+        source = _tweepy_init(auth_keys)
+    if record:
+        _v_print('Recording responses into', record, verbosity=1, level=logger.info)
+        source = RecordingSource(source, record)
+    return source
+
+def _timeline_pages(api, twitter_id: str, since_id=None, max_id=None):
+    """Yields the timeline of an account a page(up to 200 statuses, newest first) at a time,
+    walking backwards with max_id. Every call waits on the shared timeline budget and is retried
+    on its own, a failing page doesn't restart the whole timeline."""
+    budget = get_timeline_budget()
+    while True:
+        params = {'id': twitter_id, 'tweet_mode': 'extended', 'count': 200}
+        if since_id is not None:
+            params['since_id'] = since_id
+        if max_id is not None:
+            params['max_id'] = max_id
+        budget.acquire()
+        statuses = _tweepy_retry(lambda: api.user_timeline(**params), 'JSON retrieving')
+        if not statuses:
+            return
+        page = [status._json for status in statuses]
+        yield page
+        max_id = min(status['id'] for status in page) - 1
+
+def _limited_pages(pages, items: int):
+    """Passes `pages` on until `items` statuses were yielded(0 for no limit)."""
+    yielded = 0
+    for page in pages:
+        if items and yielded + len(page) >= items:
+            yield page[:items - yielded]
+            return
+        yielded = yielded + len(page)
+        yield page
+
+def _page_path(page_folder, page):
+    return os.path.join(page_folder, 'page-{:05d}.json'.format(page))
+
+def _load_page(page_folder, page):
+    with open(_page_path(page_folder, page), 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def _backfill_pages(api, twitter_id: str, checkpoints, page_folder):
+    """Walks the whole timeline backwards(max_id) one page at a time, yielding every page.
+    Every page is saved in `page_folder` and its position in the account's checkpoint before the
+    next one is requested, so an interrupted backfill resumes at the page it stopped at.
+    Pages saved by earlier runs are yielded first(read back one at a time)."""
+    checkpoint = checkpoints.get(twitter_id)
+    pages = checkpoint.get('backfill_pages', 0)
+    max_id = checkpoint.get('backfill_max_id')
+    if pages and not all(os.path.exists(_page_path(page_folder, page)) for page in range(1, pages + 1)):
+        _v_print(
+            'Saved backfill pages are missing from', page_folder, ', starting over.',
+            verbosity=0, level=logger.warning
+        )
+        pages, max_id = 0, None
+        checkpoint['backfill_done'] = False
+        checkpoints.update(twitter_id, backfill_pages=0, backfill_max_id=None, backfill_done=False)
+    elif pages and checkpoint.get('backfill_done') is not True:
+        _v_print('Resuming the backfill after page', pages, verbosity=1, level=logger.info)
+    if not os.path.exists(page_folder):
+        os.makedirs(page_folder)
+    for page in range(1, pages + 1):
+        yield _load_page(page_folder, page)
+    if checkpoint.get('backfill_done') is True:
+        return
+    for page_data in _timeline_pages(api, twitter_id, max_id=max_id):
+        pages = pages + 1
+        page_path = _page_path(page_folder, pages)
+        with open(page_path + '.tmp', 'w', encoding='utf-8') as file:
+            file.write(json.dumps(page_data, ensure_ascii=False))
+        os.replace(page_path + '.tmp', page_path)
+        max_id = min(status['id'] for status in page_data) - 1
+        # since_id is only recorded once the media of the pages was handled(`_checkpoint_update`)
+        checkpoints.update(twitter_id, backfill_pages=pages, backfill_max_id=max_id)
+        _v_print('Backfilled', pages, 'pages, reached', max_id, verbosity=1, level=None, end='\r')
+        yield page_data
+    checkpoints.update(twitter_id, backfill_done=True)
+    logger.info('Backfill of %s complete : %d pages', twitter_id, pages)
+
+def _checkpoint_update(checkpoints, twitter_id, newest_id, results=()):
+    """Records `newest_id` as the account's `since_id`, held back before the oldest tweet whose media
+    'failed' or was 'stopped' in `results`(`DownloadResult`), so the next incremental run fetches
+    that tweet again."""
+    if checkpoints is None or newest_id is None:
+        return
+    retry = [
+        int(result.tweet_id) for result in results
+        if result.status in ('failed', 'stopped') and result.tweet_id is not None
+    ]
+    if retry and min(retry) <= newest_id:
+        newest_id = min(retry) - 1
+        synced = checkpoints.since_id(twitter_id)
+        # since_id only moves forward, tweets older than the last sync aren't fetched again
+        if synced is not None and newest_id <= synced:
+            _v_print(
+                len(retry), 'media of', twitter_id, 'failed on tweets older than the last sync',
+                synced, ', run a backfill to download them again', verbosity=1, level=logger.warning
+            )
+        else:
             _v_print(
-                'Retrived', str(idx + 1), 'JSON responses.',
+                'Holding the sync of', twitter_id, 'at', newest_id, ':', len(retry),
+                'media to download again', verbosity=1, level=logger.info
+            )
+    checkpoints.update(twitter_id, since_id=newest_id)
+
+def _pipeline_put(queue, item, stop):
+    """`queue.put()` that gives up once `stop` is set, so a stage never blocks on a dead one."""
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=0.5)
+        except Full:
+            continue
+        return True
+    return False
+
+def _pipeline_get(queue, stop):
+    """Yields the items of `queue` until `_PIPELINE_DONE`, gives up once `stop` is set."""
+    while not stop.is_set():
+        try:
+            item = queue.get(timeout=0.5)
+        except Empty:
+            continue
+        if item is _PIPELINE_DONE:
+            return
+        yield item
+
+def _fetch_stage(pages, page_queue, json_path, state, stop, projection=None, raw_archive=False):
+    """Pulls timeline pages, appends them to the archive at `json_path` and queues them.
+    With a `projection` pages are stripped(see `project_status()`) before they're archived, or only
+    after if `raw_archive` is `True`."""
+    archive = ArchiveWriter(json_path) if json_path is not None else None
+    try:
+        for page in pages:
+            if not page:
+                continue
+            if projection is not None and raw_archive is not True:
+                page = [project_status(status, projection) for status in page]
+            if archive is not None:
+                if archive.count == 0:
+                    _v_print('Storing json file at ' + json_path, verbosity=2)
+                archive.write(page)
+            if projection is not None and raw_archive is True:
+                page = [project_status(status, projection) for status in page]
+            state['statuses'] = state['statuses'] + len(page)
+            state['newest'] = max([state['newest'] or 0] + [status['id'] for status in page])
+            _v_print(
+                'Retrived', str(state['statuses']), 'JSON responses.',
                 verbosity=1, level=None, end='\r'
             )
-            json_num = idx + 1
-        return json_data, json_num
-    json_data, json_num = _tweepy_retry(_get_status, 'JSON retrieving')
+            if page_queue is not None and not _pipeline_put(page_queue, page, stop):
+                break
+    finally:
+        if archive is not None:
+            archive.close()
+        if page_queue is not None:
+            _pipeline_put(page_queue, _PIPELINE_DONE, stop)
+
+def _parse_stage(page_queue, link_queue, log_path, stop):
+    """Parses queued pages for media links, logs them at `log_path` and queues them per page."""
+    log_file = open(log_path, 'w', encoding='utf-8') if log_path is not None else None
+    try:
+        while True:
+            page = page_queue.get()
+            if page is _PIPELINE_DONE:
+                break
+            links = list(iter_media_records(page))
+            if log_file is not None:
+                for record in links:
+                    log_file.write(record.url + '\n')
+            if link_queue is not None and links and not _pipeline_put(link_queue, links, stop):
+                break
+    finally:
+        if log_file is not None:
+            log_file.close()
+        if link_queue is not None:
+            _pipeline_put(link_queue, _PIPELINE_DONE, stop)
+
+def _media_pipeline(pages, json_path=None, log_path=None, parse=True, download=None,
+                    projection=None, raw_archive=False):
+    """Streams timeline `pages` through fetch -> parse -> download stages.
+    `projection`/`raw_archive` strip the statuses, see `_fetch_stage()`.
+    Pages are appended to the archive at `json_path` as they arrive, parsed for media links in a second thread and
+    `download`(run once, in this thread) gets the stream of every page's links, so a single download
+    stage(one pool or event loop) serves the whole timeline while later pages are fetched.
+    Queues between the stages hold `PIPELINE_DEPTH` pages, a slow stage holds back the one before
+    it, so memory doesn't grow with the timeline.
+    Returns a `dict` with 'statuses'(count), 'newest'(id) and 'results'(of `download`)."""
+    state = {'statuses': 0, 'newest': None, 'results': list(), 'errors': list()}
+    stop = threading.Event()
+    page_queue = Queue(maxsize=PIPELINE_DEPTH) if parse else None
+    link_queue = Queue(maxsize=PIPELINE_DEPTH) if parse and download is not None else None
+    def _run(stage, *args):
+        try:
+            stage(*args)
+        except BaseException as err:
+            # SystemExit of _tweepy_retry() included, it's raised again in the calling thread
+            state['errors'].append(err)
+            stop.set()
+    threads = [threading.Thread(
+        target=_run, args=(_fetch_stage, pages, page_queue, json_path, state, stop, projection, raw_archive),
+        daemon=True
+    )]
+    if parse:
+        threads.append(threading.Thread(
+            target=_run, args=(_parse_stage, page_queue, link_queue, log_path, stop), daemon=True
+        ))
+    for thread in threads:
+        thread.start()
+    try:
+        if link_queue is not None:
+            state['results'] = download(_pipeline_get(link_queue, stop))
+    finally:
+        if sys.exc_info()[0] is not None:
+            stop.set()
+    for thread in threads:
+        thread.join()
     _v_print('', verbosity=1, level=None, end='\r')
-    logger.info('Retrived ' + str(json_num) + ' JSON responses')
-    return json_data
+    logger.info('Pipeline handled %d JSON responses', state['statuses'])
+    if state['errors']:
+        raise state['errors'][0]
+    return state
 
 def twitter_media_downloader(**kwargs):
     """Downloads twitter media from an account. All variables are pass in kwargs. Refer to wiki."""
@@ -122,9 +351,11 @@ def twitter_media_downloader(**kwargs):
     # -j, -l and -m should work better here
     # instead of passing 'json_save', 'parser' and '
     
-    # Initialize Tweepy
+    # Initialize Tweepy, unless an authenticated api is handed over(multi-account runs)
+    api = kwargs.pop('api', None)
     try:
-        api = _tweepy_init(kwargs['auth_keys'])
+        if api is None:
+            api = _tweepy_init(kwargs['auth_keys'])
     except KeyError:
         # TODO : check if this is redundant, program should crash before it reaches here if authentication keys is missing
         _v_print('Authentication keys is missing.', 0, logger.critical)
@@ -158,32 +389,94 @@ def twitter_media_downloader(**kwargs):
     # TODO : Check if any code still uses kwargs['date']
     date = kwargs.pop('date', False)
     #sets the path depending if kwargs['location'] is given or not
+    archive_format = kwargs.pop('archive_format', None) or 'json'
     if kwargs['location'] is not None:
-        json_path = os.path.join(kwargs['location'], file_name) + '.json'
+        json_path = archive_path(os.path.join(kwargs['location'], file_name), archive_format)
+    else:
+        json_path = archive_path(
+            os.path.join(json_loc, file_name) + (date_ext if date is True else ''), archive_format
+        )
+    checkpoints = kwargs.pop('checkpoints', None)
+    since_id = None
+    incremental = kwargs.pop('incremental', False)
+    if kwargs.pop('backfill', False) is True:
+        if checkpoints is None:
+            raise ValueError('Backfill mode requires a checkpoint store.')
+        page_folder = os.path.join(
+            kwargs['location'] if kwargs['location'] is not None else json_loc,
+            file_name + '-backfill'
+        )
+        pages = _backfill_pages(api, twitter_id, checkpoints, page_folder)
     else:
-        json_path = os.path.join(json_loc, file_name) + (date_ext if date is True else '') + '.json'
-    json_data = _get_json(api, twitter_id, items)
+        if incremental is True and checkpoints is not None:
+            since_id = checkpoints.since_id(twitter_id)
+            if since_id is not None:
+                _v_print('Fetching tweets newer than', since_id, verbosity=1, level=logger.info)
+        pages = _timeline_pages(api, twitter_id, since_id)
+    # items doesn't apply to incremental syncs, their range is bound by since_id
+    pages = _limited_pages(pages, 0 if since_id is not None else items)
 
-    if json_save is True:
-        with open(json_path, 'w', encoding="utf-8") as file:
-            _v_print('Storing json file at ' + json_path, verbosity=2)
-            file.write(json.dumps(json_data, sort_keys=True, indent=4, ensure_ascii=False))
+    json_only = kwargs.pop('json_only', False) is True
+    parse = not json_only and (kwargs['parser'][0] is True or kwargs['downloader'] is True)
+    log_path = None
+    if parse and kwargs['parser'][1] is True:
+        log_path = os.path.join(
+            log_loc, (file_name +  (date_ext if date is True else '') + '.txt')
+        )
+    workers = kwargs.pop('workers', 1)
+    host_limit = kwargs.pop('host_limit', None)
+    manifest = kwargs.pop('manifest', None)
+    if kwargs.pop('engine', 'threads') == 'asyncio':
+        stream_downloader = asyncdownloader.stream_downloader
+    else:
+        stream_downloader = downloader.stream_downloader
+    download = None
+    if parse and kwargs['downloader'] is True:
+        def download(link_batches):
+            return stream_downloader(link_batches, pic_path, workers, host_limit, manifest, report=False)
+    # statuses stripped to the media fields(plus projection_fields) as they arrive, None keeps them whole
+    projection = None
+    projection_fields = kwargs.pop('projection_fields', None) or ()
+    if kwargs.pop('projection', False) is True:
+        projection = tuple(projection_fields)
+    state = _media_pipeline(
+        pages, json_path if json_save is True else None, log_path, parse, download,
+        projection, kwargs.pop('raw_archive', False) is True
+    )
+    if since_id is not None and state['statuses'] == 0:
+        _v_print('No new tweets since the last sync.', verbosity=1, level=logger.info)
+        return
 
-    if kwargs.pop('json_only', False) is True:
+    if json_only:
+        # no media was handled, since_id stays where the last media run left it
         sys.exit('complete')
 
-    log_path = os.path.join(
-        log_loc, (file_name +  (date_ext if date is True else '') + '.txt')
-    )
-    if kwargs['parser'][0] is True:
-        media_links = media_parser(json_data, log_path, kwargs['parser'][1])
-        if kwargs['downloader'] is True:
-            pic_downloader(media_links, pic_path)
-    elif kwargs['parser'][0] is False and kwargs['downloader'] is True:
-        media_links = media_parser(json_data, log_path, kwargs['parser'][1])
-        pic_downloader(media_links, pic_path)
+    if download is not None:
+        downloader._failed_report(state['results'])
+        downloader._stopped_report(state['results'], pic_path)
+    # only once the media was handled, an interrupted run fetches the same tweets again
+    _checkpoint_update(checkpoints, twitter_id, state['newest'], state['results'])
     _v_print('', verbosity=1, level=None)
 
+def _parallel_accounts(payloads, parallel):
+    """Runs `twitter_media_downloader` for `parallel` accounts at a time.
+    One account's media downloads while another's timeline is still paging; timeline calls of
+    every account wait on the same budget. The first error cancels the accounts not started yet and
+    is raised once the running ones are done."""
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        futures = [pool.submit(twitter_media_downloader, **payload) for payload in payloads]
+        try:
+            for (payload, future) in zip(payloads, futures):
+                try:
+                    future.result()
+                except Exception:
+                    logger.exception('Account %s failed', payload['twitter_id'])
+                    raise
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
 # One may call this and give it their own custom_config_path and **kwargs as well
 def seiyuu_twitter(custom_config_path=None, **kwargs):
     """Initated when `$anicration` is called without arguments."""
@@ -194,12 +487,34 @@ def seiyuu_twitter(custom_config_path=None, **kwargs):
         logging.info("{:%Y/%m/%d %H:%M:%S}".format(datetime.now()))
     _set_verbosity(0 if config.verbosity == 0 else config.verbosity - 1)
     twitter_id_loc = config.twitter_id_loc
+    # every account shares the same pooled session, so keep-alive carries across accounts
+    configure_session(
+        max(config.pool_size, kwargs.get('workers') or config.workers), config.timeout
+    )
+    configure_limiter(config.requests_per_second, config.burst, config.max_retries)
+    if not bandwidth_configured():
+        configure_bandwidth(config.max_bandwidth * 1024, config.byte_budget * 1024**2)
+    if not cache_configured() and config.http_cache is True:
+        configure_cache(config.http_cache_loc, config.http_cache_size * 1024**2)
+    # a manifest passed in(even None, when it's disabled) takes priority over the config
+    own_manifest = 'manifest' not in kwargs and config.manifest is True
+    manifest = Manifest(config.manifest_loc) if own_manifest else kwargs.get('manifest')
+    checkpoints = kwargs.get('checkpoints') or CheckpointStore(config.checkpoint_loc)
+    configure_timeline_budget(config.timeline_calls)
     # Run through set keyword arguments and set it to None if KeyError
-    for kw in ('items', 'parser', 'downloader', 'json_loc', 'log_loc', 'pic_loc'):
+    for kw in ('items', 'parser', 'downloader', 'json_loc', 'log_loc', 'pic_loc',
+               'workers', 'host_limit', 'engine', 'incremental', 'backfill', 'parallel',
+               'archive_format', 'projection', 'projection_fields', 'raw_archive'):
         try:
             kwargs[kw]
         except KeyError:
             kwargs[kw] = None
+    # authenticated once, every account shares the api(and its rate-limit window)
+    api = _open_source(
+        kwargs['auth_keys'] if kwargs.get('auth_keys') is not None else config.auth_keys,
+        kwargs.get('replay'), kwargs.get('record'), kwargs.get('replay_latency') or 0.0
+    )
+    payloads = list()
     for kw in twitter_id_loc:
         data_loc = None
         if config.data_in_pic_loc is True:
@@ -207,14 +522,31 @@ def seiyuu_twitter(custom_config_path=None, **kwargs):
                 twitter_id_loc[kw] if twitter_id_loc[kw] is not None else '', 'data'
             )
         payload = {
-            'auth_keys': kwargs['auth_keys'] if kwargs['auth_keys'] is not None else config.auth_keys,
+            'api' : api,
             'twitter_id' : kw,      #keyword is the username
             'items' : config.items if kwargs['items'] is None else kwargs['items'],
             'parser' : (config.parser, True) if kwargs['parser'] is None else kwargs['parser'],
             'downloader' : config.downloader if kwargs['downloader'] is None else kwargs['downloader'],
             'pic_loc' : twitter_id_loc[kw] if kwargs['pic_loc'] is None else kwargs['pic_loc'],
+            'workers' : config.workers if kwargs['workers'] is None else kwargs['workers'],
+            'host_limit' : config.host_limit if kwargs['host_limit'] is None else kwargs['host_limit'],
+            'engine' : 'threads' if kwargs['engine'] is None else kwargs['engine'],
+            'manifest' : manifest,
+            'checkpoints' : checkpoints,
+            'incremental' : config.incremental if kwargs['incremental'] is None else kwargs['incremental'],
+            'backfill' : kwargs['backfill'] is True,
+            'archive_format' : config.archive_format if kwargs['archive_format'] is None else kwargs['archive_format'],
+            'projection' : config.projection if kwargs['projection'] is None else kwargs['projection'],
+            'projection_fields' : (
+                tuple(config.projection_fields) if kwargs['projection_fields'] is None
+                else tuple(kwargs['projection_fields'])
+            ),
+            'raw_archive' : config.raw_archive if kwargs['raw_archive'] is None else kwargs['raw_archive'],
             'date' : True
         }
+        if payload['engine'] == 'asyncio' and kwargs['workers'] is None:
+            # the asyncio engine has its own default, config workers is meant for threads
+            payload['workers'] = None
         # Checking locations for -a mode
         if kwargs['json_loc'] is None:
             payload['json_loc'] = config.json_loc if data_loc is None else data_loc
@@ -224,67 +556,97 @@ def seiyuu_twitter(custom_config_path=None, **kwargs):
             payload['log_loc'] = config.log_loc if data_loc is None else data_loc
         else:
             payload['log_loc'] = kwargs['log_loc']
-        try:
-            twitter_media_downloader(**payload)
-        except KeyboardInterrupt:
-            print('\nERROR : User interrupted the program.')
-            sys.exit(1)
+        payloads.append(payload)
+    parallel = config.parallel_accounts if kwargs['parallel'] is None else kwargs['parallel']
+    try:
+        if parallel > 1:
+            _parallel_accounts(payloads, parallel)
+        else:
+            for payload in payloads:
+                twitter_media_downloader(**payload)
+    except KeyboardInterrupt:
+        print('\nERROR : User interrupted the program.')
+        sys.exit(1)
+    if own_manifest:
+        manifest.close()
     print('\nComplete')
+    connection_report()
+    cache_report()
+
+def _lookup_users(api, usernames):
+    """User data of every account in `usernames`, fetched with as few calls as possible(up to
+    `LOOKUP_BATCH` accounts per users/lookup call). Returns a `list` of `dict` in the order given;
+    accounts Twitter didn't answer for(suspended, renamed) are logged and left out."""
+    users = dict()
+    for idx in range(0, len(usernames), LOOKUP_BATCH):
+        batch = [username.lstrip('@') for username in usernames[idx:idx + LOOKUP_BATCH]]
+        answered = _tweepy_retry(
+            function=lambda batch=batch: api.lookup_users(screen_names=batch),
+            msg='User lookup'
+        )
+        for user in answered:
+            users[_account_key(user._json['screen_name'])] = user._json
+    user_data = list()
+    for username in usernames:
+        user = users.get(_account_key(username))
+        if user is None:
+            logger.warning('No user data returned for %s', username)
+        else:
+            user_data.append(user)
+    return user_data
+
+def _next_hour(now):
+    return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+def _sleep_until(target):
+    """Sleeps until the wall clock reaches `target`, re-checking so a long sleep can't overshoot."""
+    remaining = (target - datetime.now()).total_seconds()
+    while remaining > 0:
+        sleep(min(remaining, 60))
+        remaining = (target - datetime.now()).total_seconds()
 
 def track_twitter_info(custom_config_path=None, no_wait=False):
     """Does an hourly download of the seiyuu's info."""
     print('Initializing track_seiyuu_info()...')
-    seiyuu_names = ('@anju_inami', '@saito_shuka', '@Rikako_Aida', '@aikyan_', '@aina_suzuki723',
-                    '@suwananaka', '@box_komiyaarisa', '@furihata_ai', '@kanako_tktk')
     tsi = logging.getLogger(name=__file__)
     logging.basicConfig(filename='twitter_info.txt', level=logging.INFO)
     print('Config file created at', os.path.join(os.getcwd(), 'twitter_info.txt'))
     logging.info('TIME AT THE LAUNCH OF PROGRAM : '+"{:%Y/%m/%d %H:%M:%S}".format(datetime.now()))
     config = ConfigHandler(custom_config_path)
-    auth_keys = config.auth_keys
-    def get_user_data():
-        """Get all seiyuu data into 1 single [] JSON file."""
+    tracked_accounts = config.tracked_accounts
+    store = TimeSeriesStore(config.timeseries_loc)
+    # authenticated once, the same client serves every hourly snapshot
+    print('Authentication...', end='\r')
+    api = _tweepy_init(config.auth_keys)
+    _v_print('Authentication complete.', level=tsi.info, end='\r')
+    def get_user_data(snapshot_time):
+        """Adds the counters of every tracked account to the time-series store(and saves the
+        user data into 1 single [] JSON file if `user_data_json` is set)."""
         dt_before = datetime.now()
-
-        # Tweepy
-        print('Authentication...', end='\r')
-        api = _tweepy_init(auth_keys)
-        _v_print('Authentication complete.', level=tsi.info, end='\r')
-
-        # variables
-        date_ext = "-{:%y%m%d%H%M%S}".format(datetime.now())
+        # named after the hour it belongs to, however long the lookup took
+        date_ext = "-{:%y%m%d%H%M%S}".format(snapshot_time)
         file_name = 'user_data' + date_ext + '.json'
         tsi.info('File name : ' + file_name)
-        json_data = '['
-        for username in seiyuu_names:
-            print('Currenting downloading media from :', username, '              ', end='\r')
-            tsi.info('Obtaining user_data from ' + username)
-            user_data = _tweepy_retry(
-                function=lambda um=username: api.get_user(um), msg='Username retriving'
-            )
-            json_data = json_data + json.dumps(user_data._json, ensure_ascii=False) + ','
-        json_data = json_data[:len(json_data)-1] + ']'
-        with open(file_name, 'w', encoding='utf-8') as file:
-            file.write(json_data)
-            _v_print('Sucessfully logged json_data.', level=tsi.info, end='\r')
+        print('Obtaining user data of', len(tracked_accounts), 'accounts...', end='\r')
+        user_data = _lookup_users(api, tracked_accounts)
+        for user in user_data:
+            store.append(user['screen_name'], snapshot_time, user)
+        if config.user_data_json is True:
+            with open(file_name, 'w', encoding='utf-8') as file:
+                json.dump(user_data, file, ensure_ascii=False)
+                _v_print('Sucessfully logged json_data.', level=tsi.info, end='\r')
         # cleaning stuffs
         dt_after = datetime.now() - dt_before
-        _v_print('Sucessfully downloaded user data :', file_name,
-                 '. Process took :', str(dt_after.total_seconds()), 'seconds', level=tsi.info)
+        _v_print('Sucessfully downloaded user data of', len(user_data), 'accounts at',
+                 "{:%Y/%m/%d %H:%M}".format(snapshot_time), '. Process took :', str(dt_after.total_seconds()), 'seconds', level=tsi.info)
     if no_wait is True:
-        get_user_data()
+        get_user_data(datetime.now().replace(microsecond=0))
     while True:
-        dt = datetime.now()
-        print(dt)
-        if dt.minute != 0 or dt.second != 0:
-            delay_in_seconds = 3600 - dt.minute * 60 - dt.second
-            delay_m, delay_s = int(delay_in_seconds/60), delay_in_seconds % 60
-            print('Sleeping for ' + str(delay_m) + ' minutes, ' + str(delay_s) + ' seconds...')
-            sleep(3600 - dt.minute * 60 - dt.second)
-            print('Starting the process...')
-            get_user_data()
-            sleep(1)
-        elif dt.minute == 0 and dt.second == 0:
-            get_user_data()
-            sleep(1)
-        sleep(1)
+        # the next boundary is computed from the clock every time, so the snapshots don't drift
+        target = _next_hour(datetime.now())
+        delay_in_seconds = int((target - datetime.now()).total_seconds())
+        delay_m, delay_s = int(delay_in_seconds/60), delay_in_seconds % 60
+        print('Sleeping for ' + str(delay_m) + ' minutes, ' + str(delay_s) + ' seconds...')
+        _sleep_until(target)
+        print('Starting the process...')
+        get_user_data(target)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Stand-ins for the Twitter API, so timeline fetching runs without credentials or a network.
+A timeline source is anything offering the part of `tweepy.API` anicration uses :
+`user_timeline(id=, count=, since_id=, max_id=, ...)`, `get_user(screen_name)` and
+`lookup_users(screen_names=)`, returning
+models with their response in `._json`. The authenticated `tweepy.API` is the live source.
+`RecordingSource` wraps it and saves every response into a folder, `ReplaySource` serves that
+folder back with configurable latency and rate limits(e.g. for benchmarks and CI).
+"""
+import os
+import json
+import logging
+import threading
+from time import sleep, monotonic
+
+import tweepy
+
+from .archive import iter_archive
+from .checkpoint import _account_key
+from .ratelimit import WindowBudget, TIMELINE_WINDOW
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# user_timeline answers 20 statuses unless a count is given
+DEFAULT_COUNT = 20
+
+class _Model():
+    """Replayed response, shaped like a tweepy model."""
+    __slots__ = ('_json',)
+
+    def __init__(self, data):
+        self._json = data
+
+def _timeline_file(folder, twitter_id):
+    return os.path.join(folder, 'timeline-' + _account_key(twitter_id) + '.jsonl')
+
+class RecordingSource():
+    """Forwards calls to `api`(a `tweepy.API`) and appends the responses to `folder` :
+    timeline-<account>.jsonl holds statuses and users.jsonl holds get_user/lookup_users answers.
+    Recording again into the same folder adds to it. Thread safe."""
+    def __init__(self, api, folder):
+        self.api = api
+        self.folder = folder
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.api, name)
+
+    def _append(self, path, responses):
+        with self._lock:
+            with open(path, 'a', encoding='utf-8') as file:
+                for response in responses:
+                    file.write(json.dumps(response._json, ensure_ascii=False) + '\n')
+
+    def user_timeline(self, *args, **kwargs):
+        statuses = self.api.user_timeline(*args, **kwargs)
+        twitter_id = kwargs.get('id') or kwargs.get('screen_name') or args[0]
+        self._append(_timeline_file(self.folder, twitter_id), statuses)
+        return statuses
+
+    def get_user(self, *args, **kwargs):
+        user = self.api.get_user(*args, **kwargs)
+        self._append(os.path.join(self.folder, 'users.jsonl'), (user,))
+        return user
+
+    def lookup_users(self, *args, **kwargs):
+        users = self.api.lookup_users(*args, **kwargs)
+        self._append(os.path.join(self.folder, 'users.jsonl'), users)
+        return users
+
+class ReplaySource():
+    """Answers `user_timeline`/`get_user` from a folder written by `RecordingSource`.
+    Any timeline-<account>.* archive works(JSON or JSONL, plain/gzip/xz), so saved archives can be
+    replayed too. Every call takes `latency` seconds; with `rate_limit` only that many calls per
+    endpoint fit in `window` seconds and the rest wait, like `wait_on_rate_limit=True` does.
+    `calls` and `throttled`(seconds spent waiting) describe the session."""
+    def __init__(self, folder, latency=0.0, rate_limit=None, window=TIMELINE_WINDOW):
+        if not os.path.isdir(folder):
+            raise FileNotFoundError('No recorded responses at ' + folder)
+        self.folder = folder
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.window = window
+        self.calls = dict()
+        self.throttled = 0.0
+        self._timelines = dict()
+        self._users = None
+        self._budgets = dict()
+        self._lock = threading.Lock()
+
+    def _call(self, endpoint):
+        """Counts the call, waits out the simulated rate limit and latency."""
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            if self.rate_limit and endpoint not in self._budgets:
+                self._budgets[endpoint] = WindowBudget(self.rate_limit, self.window)
+            budget = self._budgets.get(endpoint)
+        if budget is not None:
+            start = monotonic()
+            budget.acquire()
+            with self._lock:
+                self.throttled = self.throttled + monotonic() - start
+        if self.latency:
+            sleep(self.latency)
+
+    def _timeline(self, twitter_id):
+        """Every recorded status of an account, newest first(duplicates dropped)."""
+        key = _account_key(twitter_id)
+        with self._lock:
+            if key not in self._timelines:
+                statuses = dict()
+                prefix = 'timeline-' + key + '.'
+                for name in sorted(os.listdir(self.folder)):
+                    if name.startswith(prefix):
+                        for status in iter_archive(os.path.join(self.folder, name)):
+                            statuses[status['id']] = status
+                self._timelines[key] = sorted(
+                    statuses.values(), key=lambda status: status['id'], reverse=True
+                )
+                logger.info('Replaying %d statuses of %s', len(statuses), key)
+            return self._timelines[key]
+
+    def user_timeline(self, *args, **kwargs):
+        twitter_id = kwargs.get('id') or kwargs.get('screen_name') or args[0]
+        self._call('user_timeline')
+        since_id = kwargs.get('since_id')
+        max_id = kwargs.get('max_id')
+        count = kwargs.get('count') or DEFAULT_COUNT
+        page = list()
+        for status in self._timeline(twitter_id):
+            if max_id is not None and status['id'] > max_id:
+                continue
+            if since_id is not None and status['id'] <= since_id:
+                break
+            page.append(_Model(status))
+            if len(page) >= count:
+                break
+        return page
+
+    def _recorded_users(self):
+        """`dict` of account key to the latest recorded user data."""
+        with self._lock:
+            if self._users is None:
+                self._users = dict()
+                users_path = os.path.join(self.folder, 'users.jsonl')
+                if os.path.exists(users_path):
+                    # the latest recording of a user wins
+                    for user in iter_archive(users_path):
+                        self._users[_account_key(user['screen_name'])] = user
+            return self._users
+
+    def get_user(self, *args, **kwargs):
+        screen_name = kwargs.get('screen_name') or kwargs.get('id') or args[0]
+        self._call('get_user')
+        user = self._recorded_users().get(_account_key(screen_name))
+        if user is None:
+            raise tweepy.TweepError('User {} was not recorded'.format(screen_name))
+        return _Model(user)
+
+    def lookup_users(self, user_ids=None, screen_names=None, *args, **kwargs):
+        """Like users/lookup, accounts that weren't recorded are left out of the answer."""
+        self._call('lookup_users')
+        recorded = self._recorded_users()
+        users = [recorded.get(_account_key(screen_name)) for screen_name in screen_names or ()]
+        if user_ids:
+            by_id = {user['id']: user for user in recorded.values()}
+            users.extend(by_id.get(int(user_id)) for user_id in user_ids)
+        return [_Model(user) for user in users if user is not None]
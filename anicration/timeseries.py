@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Append-only store of the counters track_twitter_info follows(followers, friends, statuses,
+favourites, listed), one file per account of fixed-width records sorted by time.
+Fixed-width records make a range query two binary searches and one read, however long the
+account has been tracked. `import_user_data()` converts the user_data-<timestamp>.json snapshots
+older versions wrote.
+"""
+import os
+import re
+import json
+import struct
+import logging
+import threading
+
+from bisect import bisect_left
+from datetime import datetime
+from collections import namedtuple
+
+from .confighandler import DEFAULT_CONFIG_PATH
+from .checkpoint import _account_key
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+DEFAULT_TIMESERIES_PATH = os.path.join(os.path.dirname(DEFAULT_CONFIG_PATH), 'timeseries')
+# Twitter user fields, in record order
+COUNTERS = ('followers_count', 'friends_count', 'statuses_count', 'favourites_count', 'listed_count')
+# timestamp(unix seconds) then the counters, all little-endian int64
+RECORD_FORMAT = '<q' + 'q' * len(COUNTERS)
+_RECORD = struct.Struct(RECORD_FORMAT)
+_EXTENSION = '.ts'
+_SNAPSHOT_NAME = re.compile(r'user_data-(\d{12})\.json$')
+
+Sample = namedtuple('Sample', ('timestamp',) + COUNTERS)
+
+class _RecordView():
+    """Timestamps of an open series file, indexable without reading it whole(for `bisect`)."""
+    def __init__(self, file, count):
+        self._file = file
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, idx):
+        self._file.seek(idx * _RECORD.size)
+        return _RECORD.unpack(self._file.read(_RECORD.size))[0]
+
+def _snapshot_time(path):
+    """The hour a user_data-<%y%m%d%H%M%S>.json snapshot was taken, `None` for other files."""
+    match = _SNAPSHOT_NAME.search(os.path.basename(path))
+    if match is None:
+        return None
+    return datetime.strptime(match.group(1), '%y%m%d%H%M%S')
+
+def _timestamp(moment):
+    """Unix seconds of a `datetime`(naive ones are local time, like the snapshot names) or a number."""
+    if isinstance(moment, datetime):
+        return int(moment.timestamp())
+    return int(moment)
+
+class TimeSeriesStore():
+    """Counter samples per account under `folder`, one <account>.ts file each. Thread safe.
+    Samples are appended in time order; older ones(e.g. from an import) are merged in."""
+    def __init__(self, folder=None):
+        self.folder = DEFAULT_TIMESERIES_PATH if not folder else folder
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        self._lock = threading.Lock()
+
+    def _path(self, twitter_id):
+        return os.path.join(self.folder, _account_key(twitter_id) + _EXTENSION)
+
+    def accounts(self):
+        """Returns a sorted `list` of the accounts with samples."""
+        return sorted(
+            name[:-len(_EXTENSION)] for name in os.listdir(self.folder) if name.endswith(_EXTENSION)
+        )
+
+    def _last_timestamp(self, path):
+        """Timestamp of the last sample, dropping a partly written one(interrupted append) first."""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r+b') as file:
+            size = file.seek(0, os.SEEK_END)
+            if size % _RECORD.size:
+                size = size - size % _RECORD.size
+                file.truncate(size)
+            if size == 0:
+                return None
+            file.seek(size - _RECORD.size)
+            return _RECORD.unpack(file.read(_RECORD.size))[0]
+
+    def append(self, twitter_id, moment, user):
+        """Adds a sample of `user`(a user `dict`, missing counters count as 0) taken at `moment`.
+        A sample at a time already stored is ignored. Returns `True` if it was added."""
+        return self.extend(twitter_id, [(moment, user)]) == 1
+
+    def extend(self, twitter_id, samples):
+        """Adds (moment, user) pairs, see `append()`. Returns how many were new."""
+        records = dict()
+        for (moment, user) in samples:
+            records[_timestamp(moment)] = tuple(int(user.get(name) or 0) for name in COUNTERS)
+        if not records:
+            return 0
+        path = self._path(twitter_id)
+        with self._lock:
+            last = self._last_timestamp(path)
+            if last is None or min(records) > last:
+                with open(path, 'ab') as file:
+                    for timestamp in sorted(records):
+                        file.write(_RECORD.pack(timestamp, *records[timestamp]))
+                return len(records)
+            # older samples : merge and rewrite the file, the stored ones take priority
+            stored = {sample[0]: sample[1:] for sample in self._read(path)}
+            added = len(set(records) - set(stored))
+            records.update(stored)
+            temp_path = path + '.tmp'
+            with open(temp_path, 'wb') as file:
+                for timestamp in sorted(records):
+                    file.write(_RECORD.pack(timestamp, *records[timestamp]))
+            os.replace(temp_path, path)
+            return added
+
+    def _read_raw(self, path, start=None, end=None):
+        if not os.path.exists(path):
+            return b''
+        with open(path, 'rb') as file:
+            # a partly written last record(interrupted append) is ignored
+            count = os.fstat(file.fileno()).st_size // _RECORD.size
+            view = _RecordView(file, count)
+            first = 0 if start is None else bisect_left(view, _timestamp(start))
+            last = count if end is None else bisect_left(view, _timestamp(end), first)
+            file.seek(first * _RECORD.size)
+            return file.read((last - first) * _RECORD.size)
+
+    def _read(self, path, start=None, end=None):
+        return [Sample(*values) for values in _RECORD.iter_unpack(self._read_raw(path, start, end))]
+
+    def range(self, twitter_id, start=None, end=None):
+        """Returns the `list` of `Sample` of an account taken from `start` up to(not including)
+        `end`; either may be `None` for an open end. Accepts `datetime` or unix seconds."""
+        return self._read(self._path(twitter_id), start, end)
+
+    def range_bytes(self, twitter_id, start=None, end=None):
+        """Like `range()`, but returns the records as they are stored(`RECORD_FORMAT` each), so they
+        can be loaded into arrays without unpacking every sample."""
+        return self._read_raw(self._path(twitter_id), start, end)
+
+def import_user_data(store, paths):
+    """Adds the samples of user_data-<timestamp>.json snapshots(files, or folders holding them)
+    to `store`. Files already imported add nothing. Returns the number of new samples."""
+    files = list()
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)))
+        else:
+            files.append(path)
+    samples = dict()
+    for path in files:
+        moment = _snapshot_time(path)
+        if moment is None:
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                users = json.load(file)
+        except ValueError as err:
+            logger.warning('Skipping unreadable snapshot %s : %s', path, err)
+            continue
+        for user in users:
+            samples.setdefault(_account_key(user['screen_name']), list()).append((moment, user))
+    added = 0
+    for (account, account_samples) in samples.items():
+        added = added + store.extend(account, account_samples)
+    logger.info('Imported %d samples from %d files', added, len(files))
+    return added
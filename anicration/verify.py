@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Re-checks downloaded media against the sizes and hashes recorded in the manifest.
+Files are hashed in parallel, so a large library can be checked for corrupted or truncated
+media without downloading anything again. `prune_library()` forgets the bad ones, so the next
+run fetches them again.
+"""
+import os
+import logging
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .auxiliaryfuncs import _v_print
+from .downloader import _percent_former, _status_print, _media_link
+from .httpcache import get_cache
+from .manifest import _file_digest
+from .mediaparser import MediaRecord
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# status is one of 'ok', 'missing', 'truncated'(size differs), 'corrupted'(hash differs)
+# or 'unhashed'(only the size could be checked)
+VerifyResult = namedtuple('VerifyResult', ['entry', 'status'])
+
+def _verify_entry(entry):
+    """Checks a single `ManifestEntry`. Returns a `VerifyResult`."""
+    try:
+        size = os.path.getsize(entry.path)
+    except OSError:
+        return VerifyResult(entry, 'missing')
+    if entry.size is not None and size != entry.size:
+        return VerifyResult(entry, 'truncated')
+    if entry.sha256 is None:
+        return VerifyResult(entry, 'unhashed')
+    if _file_digest(entry.path) != entry.sha256:
+        return VerifyResult(entry, 'corrupted')
+    return VerifyResult(entry, 'ok')
+
+def verify_library(manifest, root=None, workers=None):
+    """Verifies every file the manifest recorded(under `root` if given) with `workers` threads.
+    hashlib releases the GIL while hashing, so threads do run in parallel.
+    Returns the `list` of `VerifyResult` that are missing, truncated or corrupted('unhashed' files
+    had their size checked and are only counted)."""
+    entries = manifest.entries(root)
+    length = len(entries)
+    problems = list()
+    unhashed = 0
+    if length == 0:
+        _v_print('No recorded files to verify.', verbosity=0, level=logger.info)
+        return problems
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for (idx, result) in enumerate(pool.map(_verify_entry, entries)):
+            if result.status == 'unhashed':
+                unhashed = unhashed + 1
+            elif result.status != 'ok':
+                problems.append(result)
+            _status_print(
+                result.status + ' : ' + os.path.basename(result.entry.path),
+                _percent_former((idx+1), length), None
+            )
+    _v_print('', verbosity=0, level=None)
+    _v_print(
+        'Verified', length, 'files,', len(problems), 'with problems,', unhashed, 'without a recorded hash.',
+        verbosity=0, level=logger.info
+    )
+    for result in problems:
+        _v_print(' ', result.status, ':', result.entry.path, verbosity=0, level=logger.warning)
+    return problems
+
+def prune_library(manifest, problems):
+    """Removes the manifest rows of `problems`(see `verify_library()`) and deletes the truncated and
+    corrupted files, so the next download of their links fetches them again. Their HTTP cache
+    entries are dropped as well, a 304 would otherwise bring the same bytes back.
+    Returns the number of rows removed."""
+    cache = get_cache()
+    for result in problems:
+        entry = result.entry
+        if result.status in ('truncated', 'corrupted'):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            logger.info('Deleted %s file %s', result.status, entry.path)
+        if cache is not None and entry.url:
+            # cached under the requested link(`:orig` for .jpg) or the link of a text file
+            for url in {entry.url, _media_link(MediaRecord(entry.url))}:
+                cache.discard(url)
+        manifest.remove(entry.media_name, entry.path)
+    if problems:
+        _v_print(
+            'Removed', len(problems), 'bad files from the manifest, they are downloaded again on the next run.',
+            verbosity=0, level=logger.info
+        )
+    return len(problems)
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the parsing and downloading paths, run with `python -m benchmarks`.
+Not installed with the package.
+"""
+import os
+import tempfile
+
+# anicration resolves its default paths from APPDATA on import; the benchmarks never write there
+os.environ.setdefault('APPDATA', tempfile.gettempdir())
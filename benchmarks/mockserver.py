@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for pbs.twimg.com/video.twimg.com : serves generated jpg/mp4 payloads at
+/media/<name>.<ext>(':orig' is ignored), with Range support, a fixed latency and an error rate.
+Runs in its own process, so serving doesn't compete with the benchmarked client for the GIL.
+"""
+import random
+import multiprocessing
+
+from time import sleep
+from socketserver import ThreadingMixIn
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+JPG_SIZE = 150 * 1024
+MP4_SIZE = 2 * 1024**2
+_MAGIC = {'.jpg': b'\xff\xd8\xff\xe0', '.png': b'\x89PNG\r\n\x1a\n', '.mp4': b'\x00\x00\x00\x18ftypmp42'}
+
+def _payload(ext, size):
+    pattern = bytes(range(256))
+    body = _MAGIC.get(ext, b'') + pattern * (size // 256 + 1)
+    return body[:size]
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve()
+
+    def _serve(self, head=False):
+        server = self.server
+        with server.stats.get_lock():
+            server.stats.value = server.stats.value + 1
+        if server.latency:
+            sleep(server.latency)
+        path = self.path.split('?')[0].split(':orig')[0]
+        ext = path[path.rfind('.'):]
+        if not path.startswith('/media/') or ext not in server.payloads:
+            return self._empty(404)
+        if server.error_rate and server.rng.random() < server.error_rate:
+            return self._empty(503)
+        body = server.payloads[ext]
+        status, start = 200, 0
+        byte_range = self.headers.get('Range')
+        if byte_range:
+            start = int(byte_range.split('=')[1].split('-')[0])
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', 'bytes */{}'.format(len(body)))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status = 206
+        self.send_response(status)
+        if status == 206:
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, len(body) - 1, len(body)))
+        self.send_header('Content-Type', 'video/mp4' if ext == '.mp4' else 'image/jpeg')
+        self.send_header('Content-Length', str(len(body) - start))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body[start:])
+
+    def _empty(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 drops bursts of connects, which then wait out a 1s SYN retry
+    request_queue_size = 256
+
+def _serve(ready, stats, latency, error_rate, jpg_size, mp4_size, seed):
+    server = _Server(('127.0.0.1', 0), _Handler)
+    server.stats = stats
+    server.latency = latency
+    server.error_rate = error_rate
+    server.rng = random.Random(seed)
+    server.payloads = {
+        '.jpg': _payload('.jpg', jpg_size),
+        '.png': _payload('.png', jpg_size),
+        '.mp4': _payload('.mp4', mp4_size),
+    }
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+class MockMediaServer():
+    """Context manager running the server in a child process. `url` is its base address,
+    `requests` counts every request served so far(retries included)."""
+    def __init__(self, latency=0.0, error_rate=0.0, jpg_size=JPG_SIZE, mp4_size=MP4_SIZE, seed=0):
+        self._options = (latency, error_rate, jpg_size, mp4_size, seed)
+        self._context = multiprocessing.get_context('spawn')
+        self._stats = self._context.Value('i', 0)
+        self._process = None
+        self.url = None
+
+    @property
+    def requests(self):
+        return self._stats.value
+
+    def start(self):
+        ready = self._context.Queue()
+        self._process = self._context.Process(
+            target=_serve, args=(ready, self._stats) + self._options, daemon=True
+        )
+        self._process.start()
+        self.url = 'http://127.0.0.1:{}'.format(ready.get(timeout=30))
+        return self
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
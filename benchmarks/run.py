@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Runs the benchmark cases, each in a fresh interpreter so its peak RSS is its own, prints
+throughput, latency percentiles and peak RSS, and saves/compares baseline results(JSON).
+
+    python -m benchmarks                      # every case
+    python -m benchmarks --quick -k download  # smaller inputs, only cases matching 'download'
+    python -m benchmarks --save               # store the results as the baseline
+    python -m benchmarks --compare            # exit 1 if throughput regressed past --threshold
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import platform
+import tempfile
+import contextlib
+import multiprocessing
+
+from time import perf_counter
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+from . import synthetic
+from .mockserver import MockMediaServer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_THRESHOLD = 0.15
+
+def _peak_rss_mb():
+    """Peak resident memory of this process in MB, `None` where `resource` is unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024**2 if sys.platform == 'darwin' else 1024), 1)
+
+def _percentiles(samples):
+    """p50/p90/p99/max of `samples`(seconds) in milliseconds, nearest rank."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    def _rank(percent):
+        return ordered[min(len(ordered) - 1, int(round(percent / 100 * len(ordered) + 0.5)) - 1)]
+    return OrderedDict(
+        (name, round(value * 1000, 2)) for (name, value) in (
+            ('p50', _rank(50)), ('p90', _rank(90)), ('p99', _rank(99)), ('max', ordered[-1])
+        )
+    )
+
+@contextlib.contextmanager
+def _timed(module, name, samples):
+    """Swaps `module.name` for a wrapper appending each call's duration to `samples`."""
+    original = getattr(module, name)
+    if asyncio.iscoroutinefunction(original):
+        async def _wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                samples.append(perf_counter() - start)
+    else:
+        def _wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(perf_counter() - start)
+    setattr(module, name, _wrapper)
+    try:
+        yield
+    finally:
+        setattr(module, name, original)
+
+def _result(items, unit, seconds, samples=None, **extra):
+    result = OrderedDict([
+        ('items', items),
+        ('unit', unit),
+        ('seconds', round(seconds, 4)),
+        ('throughput', round(items / seconds, 2) if seconds else None),
+        ('latency_ms', _percentiles(samples or ())),
+    ])
+    result.update(extra)
+    return result
+
+def _configure_downloads(workers):
+    """Isolated network state : no HTTP cache, no bandwidth limit, a shortened backoff."""
+    from anicration.httpsession import configure_session
+    from anicration.httpcache import configure_cache
+    from anicration.ratelimit import configure_limiter, configure_bandwidth, get_limiter
+    configure_session(max(10, workers or 1), (10, 60))
+    configure_cache(enabled=False)
+    configure_bandwidth()
+    configure_limiter(retries=4)
+    # injected errors should measure the retry path, not the seconds of a production backoff
+    get_limiter().backoff.base = 0.05
+
+# ============================ cases ============================ #
+
+def media_parser_case(statuses, source='list'):
+    """`media_parser` over a synthetic timeline, given as a list or as a jsonl.gz archive path."""
+    from anicration.mediaparser import media_parser
+    from anicration.archive import ArchiveWriter
+    timeline = synthetic.make_timeline(statuses)
+    samples = list()
+    with tempfile.TemporaryDirectory() as folder:
+        json_data = timeline
+        if source == 'archive':
+            json_data = os.path.join(folder, 'timeline.jsonl.gz')
+            with ArchiveWriter(json_data) as archive:
+                archive.write(timeline)
+            del timeline
+        repeats = max(1, 100000 // statuses)
+        for _ in range(repeats):
+            start = perf_counter()
+            links = media_parser(json_data, os.path.join(folder, 'links.txt'), True)
+            samples.append(perf_counter() - start)
+    return _result(statuses * repeats, 'statuses/s', sum(samples), samples, links=len(links))
+
+def file_parser_case(lines):
+    """`_file_parser` over a link file with comments, blanks and unsupported links mixed in."""
+    from anicration.downloader import _file_parser
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'links.txt')
+        synthetic.write_link_file(path, lines)
+        start = perf_counter()
+        with open(path, 'r', encoding='utf-8') as file:
+            links = _file_parser(file)
+        seconds = perf_counter() - start
+    return _result(lines, 'lines/s', seconds, links=len(links))
+
+def download_case(files, workers=8, engine='threads', latency=0.02, error_rate=0.0, video_ratio=0.1):
+    """`pic_downloader`(threads or asyncio engine) against the mock server.
+    Latency percentiles are per file, retries included."""
+    from anicration import downloader, asyncdownloader
+    _configure_downloads(workers)
+    module = asyncdownloader if engine == 'asyncio' else downloader
+    samples = list()
+    with MockMediaServer(latency, error_rate) as server, tempfile.TemporaryDirectory() as folder:
+        links = synthetic.media_links(files, server.url, video_ratio)
+        with _timed(module, '_media_fetch', samples):
+            start = perf_counter()
+            results = module.pic_downloader(links, folder, workers, None, None)
+            seconds = perf_counter() - start
+        requests_made = server.requests
+    downloaded = [result for result in results if result.status == 'downloaded']
+    size = sum(result.size for result in downloaded)
+    return _result(
+        len(downloaded), 'files/s', seconds, samples,
+        mb_per_s=round(size / 1024**2 / seconds, 2), failed=len(results) - len(downloaded),
+        requests=requests_made
+    )
+
+def textfile_case(files, latency=0.02, error_rate=0.0):
+    """Textfile mode(`textfile_handler`, sequential) against the mock server."""
+    from anicration import anicration as cli
+    _configure_downloads(1)
+    samples = list()
+    with MockMediaServer(latency, error_rate) as server, tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'links.txt')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(synthetic.media_links(files, server.url)) + '\n')
+        save_location = os.path.join(folder, 'media')
+        with _timed(cli, '_resume_download', samples):
+            start = perf_counter()
+            cli.textfile_handler(path, save_location=save_location, override=False, manifest=None)
+            seconds = perf_counter() - start
+        downloaded = len(os.listdir(save_location))
+    return _result(downloaded, 'files/s', seconds, samples, failed=files - downloaded)
+
+def cases(quick=False):
+    """Returns an `OrderedDict` of case name to (function, kwargs)."""
+    statuses = (1000, 10000) if quick else (1000, 10000, 100000)
+    files = 100 if quick else 500
+    registry = OrderedDict()
+    for count in statuses:
+        registry['media_parser/list/{}'.format(count)] = (media_parser_case, {'statuses': count})
+    registry['media_parser/archive/{}'.format(statuses[-1])] = (
+        media_parser_case, {'statuses': statuses[-1], 'source': 'archive'}
+    )
+    for lines in ((10000, 100000) if quick else (10000, 100000, 1000000)):
+        registry['file_parser/{}'.format(lines)] = (file_parser_case, {'lines': lines})
+    registry['download/threads/serial'] = (download_case, {'files': files // 5, 'workers': 1})
+    registry['download/threads/8'] = (download_case, {'files': files, 'workers': 8})
+    registry['download/threads/8/errors'] = (
+        download_case, {'files': files, 'workers': 8, 'error_rate': 0.05}
+    )
+    registry['download/asyncio/64'] = (
+        download_case, {'files': files, 'workers': 64, 'engine': 'asyncio'}
+    )
+    registry['textfile'] = (textfile_case, {'files': files // 5})
+    return registry
+
+# ============================ runner ============================ #
+
+def _child(queue, function, kwargs):
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = function(**kwargs)
+        result['peak_rss_mb'] = _peak_rss_mb()
+        queue.put(result)
+    except BaseException as err:
+        queue.put({'error': '{}: {}'.format(type(err).__name__, err)})
+        raise
+
+def run_case(function, kwargs):
+    """Runs one case in a fresh(spawned) interpreter. Returns its result `dict`."""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(queue, function, kwargs))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def _format(name, result):
+    if 'error' in result:
+        return '{:<32} ERROR {}'.format(name, result['error'])
+    line = '{:<32} {:>12,.1f} {:<12}'.format(name, result['throughput'] or 0, result['unit'])
+    if result['latency_ms']:
+        line = line + ' p50 {p50:>8.2f}ms p99 {p99:>8.2f}ms'.format(**result['latency_ms'])
+    else:
+        line = line + ' ' * 30
+    if result.get('peak_rss_mb') is not None:
+        line = line + ' rss {:>7.1f}MB'.format(result['peak_rss_mb'])
+    if result.get('failed'):
+        line = line + ' failed {}'.format(result['failed'])
+    return line
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Returns the `list` of (name, old, new) whose throughput fell more than `threshold` below
+    the baseline. Cases missing on either side are ignored."""
+    regressions = list()
+    for (name, result) in results.items():
+        old = baseline.get('results', {}).get(name)
+        if not old or 'error' in old or 'error' in result or not old.get('throughput'):
+            continue
+        if result['throughput'] < old['throughput'] * (1 - threshold):
+            regressions.append((name, old['throughput'], result['throughput']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n')[1])
+    parser.add_argument('-k', '--keyword', default=None, help='Only run cases whose name contains this')
+    parser.add_argument('--quick', action='store_true', help='Smaller inputs, for a fast check')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, metavar='loc', help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Save the results as the baseline')
+    parser.add_argument('--compare', action='store_true', help='Compare against the baseline')
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help='Throughput drop counted as a regression(default 0.15)')
+    args = parser.parse_args(argv)
+
+    results = OrderedDict()
+    for (name, (function, kwargs)) in cases(args.quick).items():
+        if args.keyword is not None and args.keyword not in name:
+            continue
+        results[name] = run_case(function, kwargs)
+        print(_format(name, results[name]), flush=True)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'quick': args.quick,
+                'results': results,
+            }, file, indent=4)
+        print('Baseline saved at', args.baseline)
+    if args.compare:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for (name, old, new) in regressions:
+            print('REGRESSION {} : {:,.1f} -> {:,.1f}'.format(name, old, new))
+        if regressions:
+            sys.exit(1)
+        print('No regressions against', args.baseline)
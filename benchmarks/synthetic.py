@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Generates Twitter-like timelines and link files. Seeded, so every run parses the same data.
+"""
+import random
+
+from datetime import datetime, timedelta
+
+MEDIA_BASE = 'https://pbs.twimg.com/media/'
+VIDEO_BASE = 'https://video.twimg.com/ext_tw_video/'
+# share of statuses by kind, the rest carry no media
+PHOTO_RATIO = 0.55
+VIDEO_RATIO = 0.1
+RETWEET_RATIO = 0.1
+QUOTE_RATIO = 0.05
+
+def _photo_entities(rng, status_id, media_base):
+    media = list()
+    for idx in range(rng.randint(1, 4)):
+        name = '{}{:x}'.format(status_id, idx)
+        media.append({
+            'id': status_id * 10 + idx,
+            'type': 'photo',
+            'media_url': (media_base + name + '.jpg').replace('https://', 'http://', 1),
+            'media_url_https': media_base + name + '.jpg',
+        })
+    return {'media': media}
+
+def _video_entities(rng, status_id, video_base):
+    name = '{:x}'.format(status_id)
+    return {'media': [{
+        'id': status_id * 10,
+        'type': 'video',
+        'media_url_https': MEDIA_BASE + name + '_thumb.jpg',
+        'video_info': {'variants': [
+            {'content_type': 'application/x-mpegURL', 'url': video_base + name + '.m3u8'},
+            {'bitrate': 832000, 'content_type': 'video/mp4', 'url': video_base + name + '_832.mp4'},
+            {'bitrate': 2176000, 'content_type': 'video/mp4', 'url': video_base + name + '.mp4'},
+            {'bitrate': 256000, 'content_type': 'video/mp4', 'url': video_base + name + '_256.mp4'},
+        ]},
+    }]}
+
+def make_status(rng, status_id, created_at, media_base=MEDIA_BASE, video_base=VIDEO_BASE):
+    """A single status `dict` with the fields `media_parser` and the archives use."""
+    status = {
+        'id': status_id,
+        'id_str': str(status_id),
+        'created_at': created_at.strftime('%a %b %d %H:%M:%S +0000 %Y'),
+        'full_text': 'status {} '.format(status_id) + 'x' * rng.randint(10, 200),
+        'truncated': False,
+        'is_quote_status': False,
+        'favorite_count': rng.randint(0, 5000),
+        'retweet_count': rng.randint(0, 1000),
+        'user': {'id': 1, 'screen_name': 'benchmark'},
+    }
+    kind = rng.random()
+    if kind < PHOTO_RATIO:
+        status['extended_entities'] = _photo_entities(rng, status_id, media_base)
+    elif kind < PHOTO_RATIO + VIDEO_RATIO:
+        status['extended_entities'] = _video_entities(rng, status_id, video_base)
+    elif kind < PHOTO_RATIO + VIDEO_RATIO + RETWEET_RATIO:
+        status['retweeted_status'] = {
+            'id': status_id - 1,
+            'extended_entities': _photo_entities(rng, status_id - 1, media_base),
+        }
+    elif kind < PHOTO_RATIO + VIDEO_RATIO + RETWEET_RATIO + QUOTE_RATIO:
+        status['is_quote_status'] = True
+        status['quoted_status'] = {'id': status_id - 2, 'full_text': 'quoted', 'created_at': status['created_at']}
+    return status
+
+def make_timeline(count, seed=0, media_base=MEDIA_BASE, video_base=VIDEO_BASE):
+    """Returns a `list` of `count` statuses, newest first."""
+    rng = random.Random(seed)
+    newest = datetime(2020, 1, 1)
+    first_id = 1200000000000000000
+    return [
+        make_status(
+            rng, first_id - idx * 1000, newest - timedelta(minutes=idx * 7), media_base, video_base
+        )
+        for idx in range(count)
+    ]
+
+def media_links(count, base_url, video_ratio=0.1, seed=0):
+    """`count` media links on `base_url`(jpg, and mp4 for `video_ratio` of them)."""
+    rng = random.Random(seed)
+    links = list()
+    for idx in range(count):
+        ext = '.mp4' if rng.random() < video_ratio else '.jpg'
+        links.append('{}/media/b{:07d}{}'.format(base_url, idx, ext))
+    return links
+
+def write_link_file(path, count, base_url='https://pbs.twimg.com', seed=0):
+    """Writes a textfile mode link list of `count` lines : mostly links, some comments, blank lines
+    and unsupported extensions the parser has to skip."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as file:
+        for idx in range(count):
+            kind = rng.random()
+            if kind < 0.02:
+                file.write('# comment {}\n'.format(idx))
+            elif kind < 0.04:
+                file.write('\n')
+            elif kind < 0.06:
+                file.write('{}/media/c{:07d}.gif\n'.format(base_url, idx))
+            else:
+                file.write('{}/media/c{:07d}{}\n'.format(base_url, idx, rng.choice(('.jpg', '.png', '.mp4'))))
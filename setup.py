@@ -24,7 +24,8 @@ setup(
     entry_points={
         'console_scripts':[
             'anicration=anicration.anicration:main',
-            'track_twitter_info=anicration.seiyuuhandler:track_twitter_info'
+            'track_twitter_info=anicration.seiyuuhandler:track_twitter_info',
+            'anicration_stats=anicration.analytics:main'
         ]
     }
 )
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Regression tests of the incremental JSON array decoding in archive.py : values split across
+chunk boundaries, values larger than a chunk, empty arrays and truncated files.
+"""
+import io
+import os
+import json
+import tempfile
+import unittest
+
+from anicration.archive import ArchiveWriter, _iter_json_array, iter_archive
+
+# numbers, escapes and non-ASCII text end up on chunk boundaries at the tiny sizes
+STATUSES = [
+    {'id': 1234567890123456789, 'full_text': 'café こんにちは \\"quoted\\"',
+     'truncated': False, 'ratio': -1.5e-3, 'entities': {'hashtags': [], 'urls': [None, True]}},
+    {'id': 7, 'full_text': 'a, b ] c [ d', 'nested': [[1, 2], [3, [4, {'x': '}'}]]]},
+    {'id': 8, 'full_text': 'x' * 300},
+    12345,
+    'a string value',
+]
+CHUNK_SIZES = list(range(1, 33)) + [64, 100, 1024]
+
+def _decode(text, chunk_size):
+    """Every value of the JSON array `text`, read `chunk_size` characters at a time."""
+    file = io.StringIO(text)
+    while file.read(1) != '[':
+        pass
+    return list(_iter_json_array(file, chunk_size))
+
+def _writer_layout(statuses):
+    """The JSON array layout `ArchiveWriter` saves."""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'timeline.json')
+        with ArchiveWriter(path) as archive:
+            archive.write(statuses)
+        with open(path, 'r', encoding='utf-8') as file:
+            return file.read()
+
+class IterJsonArrayTest(unittest.TestCase):
+    def test_baseline_layout(self):
+        text = json.dumps(STATUSES, indent=4)
+        for chunk_size in CHUNK_SIZES:
+            self.assertEqual(_decode(text, chunk_size), STATUSES, chunk_size)
+
+    def test_writer_layout(self):
+        text = _writer_layout(STATUSES)
+        for chunk_size in CHUNK_SIZES:
+            self.assertEqual(_decode(text, chunk_size), STATUSES, chunk_size)
+
+    def test_compact_layout(self):
+        text = json.dumps(STATUSES, separators=(',', ':'))
+        for chunk_size in CHUNK_SIZES:
+            self.assertEqual(_decode(text, chunk_size), STATUSES, chunk_size)
+
+    def test_empty_array(self):
+        for text in ('[]', '[\n]', json.dumps([], indent=4), ' \n[ \n ] \n'):
+            for chunk_size in (1, 2, 1024):
+                self.assertEqual(_decode(text, chunk_size), [], repr(text))
+
+    def test_truncated(self):
+        text = json.dumps(STATUSES, indent=4)
+        for cut in (len(text) - 1, len(text) // 2, 5):
+            for chunk_size in (1, 7, 1024):
+                with self.assertRaises(ValueError):
+                    _decode(text[:cut], chunk_size)
+
+class IterArchiveTest(unittest.TestCase):
+    def test_formats(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for archive_format in ('json', 'jsonl', 'jsonl.gz', 'jsonl.xz'):
+                path = os.path.join(folder, 'timeline.' + archive_format)
+                with ArchiveWriter(path) as archive:
+                    archive.write(STATUSES[:3])
+                self.assertEqual(list(iter_archive(path)), STATUSES[:3], archive_format)
+
+if __name__ == '__main__':
+    unittest.main()
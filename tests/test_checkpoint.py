@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Regression tests of the since_id checkpoint in seiyuuhandler.py : held back before tweets whose
+media failed, left alone by backfill pages until their media was handled and by json-only runs.
+"""
+import os
+import tempfile
+import unittest
+
+from anicration.checkpoint import CheckpointStore
+from anicration.downloader import DownloadResult
+from anicration.seiyuuhandler import _backfill_pages, _checkpoint_update, twitter_media_downloader
+
+TWITTER_ID = '@account'
+
+class _Status():
+    def __init__(self, status_json):
+        self._json = status_json
+
+class _TimelineApi():
+    """`user_timeline()` over the statuses `ids`, newest first, `count` at a time."""
+    def __init__(self, ids, count=3):
+        self.ids = sorted(ids, reverse=True)
+        self.count = count
+
+    def user_timeline(self, **params):
+        ids = [
+            status_id for status_id in self.ids
+            if status_id > (params.get('since_id') or 0)
+            and status_id <= (params.get('max_id') or self.ids[0])
+        ]
+        return [_Status({'id': status_id, 'full_text': 'text'}) for status_id in ids[:self.count]]
+
+def _result(status, tweet_id):
+    return DownloadResult('https://pbs.twimg.com/media/a.jpg', 'a.jpg', status, None, tweet_id=str(tweet_id))
+
+class CheckpointUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.checkpoints = CheckpointStore(os.path.join(self.folder.name, 'checkpoints.json'))
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_no_failures(self):
+        _checkpoint_update(self.checkpoints, TWITTER_ID, 120, [_result('downloaded', 120)])
+        self.assertEqual(self.checkpoints.since_id(TWITTER_ID), 120)
+
+    def test_held_before_oldest_failure(self):
+        results = [_result('downloaded', 120), _result('stopped', 115), _result('failed', 110)]
+        _checkpoint_update(self.checkpoints, TWITTER_ID, 120, results)
+        self.assertEqual(self.checkpoints.since_id(TWITTER_ID), 109)
+
+    def test_older_than_last_sync(self):
+        self.checkpoints.update(TWITTER_ID, since_id=150)
+        with self.assertLogs('anicration.seiyuuhandler', 'WARNING'):
+            _checkpoint_update(self.checkpoints, TWITTER_ID, 120, [_result('failed', 110)])
+        self.assertEqual(self.checkpoints.since_id(TWITTER_ID), 150)
+
+    def test_backfill_held_before_failure(self):
+        api = _TimelineApi(range(101, 111))
+        page_folder = os.path.join(self.folder.name, 'account-backfill')
+        pages = list(_backfill_pages(api, TWITTER_ID, self.checkpoints, page_folder))
+        self.assertEqual(sum(len(page) for page in pages), 10)
+        # the pages are saved, their media isn't handled yet
+        self.assertIsNone(self.checkpoints.since_id(TWITTER_ID))
+        self.assertTrue(self.checkpoints.get(TWITTER_ID)['backfill_done'])
+        _checkpoint_update(self.checkpoints, TWITTER_ID, 110, [_result('failed', 108)])
+        self.assertEqual(self.checkpoints.since_id(TWITTER_ID), 107)
+
+    def test_json_only(self):
+        payload = {
+            'api': _TimelineApi(range(101, 111)), 'twitter_id': TWITTER_ID, 'location': None,
+            'json_loc': os.path.join(self.folder.name, 'json'),
+            'log_loc': os.path.join(self.folder.name, 'log'),
+            'pic_loc': os.path.join(self.folder.name, 'pictures'),
+            'parser': (True, True), 'downloader': True, 'json_only': True,
+            'checkpoints': self.checkpoints, 'incremental': True,
+        }
+        with self.assertRaises(SystemExit):
+            twitter_media_downloader(**payload)
+        self.assertTrue(os.path.exists(os.path.join(self.folder.name, 'json', 'account.json')))
+        self.assertIsNone(self.checkpoints.since_id(TWITTER_ID))
+
+if __name__ == '__main__':
+    unittest.main()